@@ -0,0 +1,173 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pydicom
+
+from series_loader import DEFAULT_WORKERS
+
+# Critical DICOM tags to anonymize
+CRITICAL_TAGS = [
+    'PatientName', 'PatientID', 'PatientBirthDate', 'PatientSex',
+    'IssuerOfPatientID', 'StudyInstanceUID', 'SeriesInstanceUID', 'InstitutionName', 'InstitutionAddress',
+    'ReferringPhysicianName'
+]
+
+AUDIT_FILE_NAME = "anonymization_audit.json"
+HASH_LENGTH = 16  # Hex digits (64 bits) of non-UID replacements: collision-free across large cohorts
+DEFAULT_KEY_PATH = os.environ.get(
+    "DICOM_VIEWER_ANON_KEY", os.path.join(os.path.expanduser("~"), ".dicom_viewer", "anonymization.key"))
+
+
+class UIDMapper:
+    """Deterministic replacements for identifying values, keyed by a secret.
+
+    The same original value always maps to the same replacement for as long as
+    the key is kept, within a batch and across runs, so a series stays one
+    series and a study can be anonymized incrementally.  UIDs are replaced by
+    valid "2.25." UIDs derived from the key; other values become the prefix
+    plus a keyed hash.  Only the key is stored, never a table of original values.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.mapped = {}
+
+    @classmethod
+    def load(cls, key_path=DEFAULT_KEY_PATH):
+        """Load the key from key_path, creating a new random key on first use."""
+        try:
+            with open(key_path) as f:
+                return cls(bytes.fromhex(f.read().strip()))
+        except FileNotFoundError:
+            pass
+        key = secrets.token_bytes(32)
+        os.makedirs(os.path.dirname(os.path.abspath(key_path)), exist_ok=True)
+        try:
+            descriptor = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return cls.load(key_path)  # Another process created it first
+        with os.fdopen(descriptor, "w") as f:
+            f.write(key.hex())
+        return cls(key)
+
+    def map_value(self, tag, value, prefix=""):
+        """Return the replacement for `value` of the DICOM keyword `tag`."""
+        original = str(value)
+        cache_key = (tag, original, prefix)
+        if cache_key not in self.mapped:
+            if tag.endswith("UID"):
+                # A 128-bit integer under the UUID-derived "2.25" root, as in PS3.5 B.2
+                digest = hmac.new(self.key, original.encode(), hashlib.sha256).digest()
+                replacement = f"2.25.{int.from_bytes(digest[:16], 'big')}"
+            else:
+                digest = hmac.new(self.key, f"{tag}\0{original}".encode(), hashlib.sha256).hexdigest()
+                replacement = prefix + digest[:HASH_LENGTH].upper()
+            self.mapped[cache_key] = replacement
+        return self.mapped[cache_key]
+
+
+def anonymize_dataset(dicom_data, prefix, mapper):
+    """Replace the critical tags of a dataset in place using a UIDMapper.
+
+    Returns a {keyword: new value} dict of the tags that were replaced.
+    """
+    replaced = {}
+    for tag in CRITICAL_TAGS:
+        if tag in dicom_data:
+            new_value = mapper.map_value(tag, dicom_data[tag].value, prefix)
+            dicom_data[tag].value = new_value
+            replaced[tag] = new_value
+    return replaced
+
+
+class BatchAnonymizer:
+    """Anonymizes many files on a worker pool into a separate output directory.
+
+    Pixel data is copied through without being decoded.  Replacement values
+    come from one UIDMapper shared by the whole batch.  Each output file is
+    written to a temporary name and renamed into place, so an interrupted run
+    never leaves half-written files behind.  One JSON audit file listing every
+    input, its output and the replaced tags is written to the output directory;
+    original values are not recorded in it.
+    """
+
+    def __init__(self, prefix, output_dir, mapper, max_workers=DEFAULT_WORKERS):
+        self.prefix = prefix
+        self.output_dir = output_dir
+        self.mapper = mapper
+        self.max_workers = max_workers
+
+    def output_path(self, file_path, source_root):
+        return os.path.join(self.output_dir, os.path.relpath(file_path, source_root))
+
+    def anonymize_file(self, file_path, output_path):
+        record = {"source": file_path, "output": output_path}
+        try:
+            # Large elements such as PixelData are only read back from the source when saving
+            dicom_data = pydicom.dcmread(file_path, defer_size="256 KB")
+            record["replaced"] = anonymize_dataset(dicom_data, self.prefix, self.mapper)
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            temp_path = f"{output_path}.{os.getpid()}.tmp"
+            try:
+                dicom_data.save_as(temp_path)
+                os.replace(temp_path, output_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+        return record
+
+    def run(self, file_paths, progress=None, should_stop=None):
+        """Anonymize every file and write the audit file; returns the audit records.
+
+        `progress(done, total)` is called after each file and `should_stop()`
+        is polled to cancel the files not started yet.
+        """
+        file_paths = [os.path.abspath(path) for path in file_paths]
+        if not file_paths:
+            return []
+        source_root = os.path.commonpath([os.path.dirname(path) for path in file_paths])
+
+        records = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.anonymize_file, path, self.output_path(path, source_root))
+                       for path in file_paths]
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    records.append(future.result())
+                    if progress is not None:
+                        progress(done, len(file_paths))
+                    if should_stop is not None and should_stop():
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        records.sort(key=lambda record: record["source"])
+        self.write_audit(records)
+        return records
+
+    def write_audit(self, records):
+        os.makedirs(self.output_dir, exist_ok=True)
+        audit = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "prefix": self.prefix,
+            "tags": CRITICAL_TAGS,
+            "anonymized": sum(record["status"] == "ok" for record in records),
+            "failed": sum(record["status"] != "ok" for record in records),
+            "files": records,
+        }
+        audit_path = os.path.join(self.output_dir, AUDIT_FILE_NAME)
+        with open(audit_path + ".tmp", "w") as f:
+            json.dump(audit, f, indent=2)
+        os.replace(audit_path + ".tmp", audit_path)
+        return audit_path
@@ -0,0 +1,65 @@
+"""Measure cine playback frame rate of DICOMImageCanvas.
+
+Compares the old per-frame redraw (ax.clear + imshow + draw) with the
+persistent image artist used by DICOMImageCanvas.display_image.
+
+    python bench_cine.py [file.dcm] [--frames 200]
+
+Set QT_QPA_PLATFORM=offscreen to run it without a display.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pydicom
+from PyQt5.QtWidgets import QApplication
+
+from fullversion import DICOMImageCanvas
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_example", "M2D.dcm")
+
+
+def redraw_every_frame(canvas, pixel_array):
+    """The display path DICOMImageCanvas used before the persistent artist."""
+    canvas.ax.clear()
+    canvas.ax.imshow(pixel_array, cmap='gray')
+    canvas.ax.axis('off')
+    canvas.draw()
+
+
+def measure(app, display, canvas, frames, count):
+    display(canvas, frames[0])  # Warm up: first draw, background capture
+    app.processEvents()
+    start = time.perf_counter()
+    for i in range(count):
+        display(canvas, frames[i % len(frames)])
+        app.processEvents()  # Let Qt paint the frame, as the timer-driven playback does
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", default=DEFAULT_FILE, help="multi-frame DICOM file")
+    parser.add_argument("--frames", type=int, default=200, help="number of frames to display per run")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    dataset = pydicom.dcmread(args.file)
+    frames = dataset.pixel_array
+    if int(dataset.get("NumberOfFrames", 1)) == 1:
+        frames = frames[None]
+    print(f"{os.path.basename(args.file)}: {len(frames)} frames of {frames.shape[1:]} {frames.dtype}")
+
+    for name, display in (("clear + imshow + draw", redraw_every_frame),
+                          ("persistent artist + blit", DICOMImageCanvas.display_image)):
+        canvas = DICOMImageCanvas()
+        canvas.resize(800, 600)
+        canvas.show()
+        fps = measure(app, display, canvas, frames, args.frames)
+        print(f"{name:>26}: {fps:7.1f} FPS")
+        canvas.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Headless batch processing of DICOM study folders.
+
+Runs the viewer's folder loading, summary, anonymization and export logic
+without Qt or matplotlib, one worker process per study folder (or single
+DICOM file):
+
+    python dicom_cli.py summarize STUDY_DIR [STUDY_DIR ...] [--attributes]
+    python dicom_cli.py anonymize STUDY_DIR ... --prefix ANON --output OUT_DIR
+    python dicom_cli.py thumbnails STUDY_DIR ... --output OUT_DIR [--size 250]
+    python dicom_cli.py volume STUDY_DIR ... --output OUT_DIR
+    python dicom_cli.py export STUDY_DIR ... --output OUT_DIR [--format .nii.gz|.mha|.npy]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from anonymizer import DEFAULT_KEY_PATH, BatchAnonymizer, UIDMapper
+from dicom_metadata import attribute_rows, format_details
+from series_loader import (
+    DEFAULT_WORKERS, group_series, list_dicom_files, load_series, read_headers, sort_slices
+)
+from thumbnails import make_thumbnail, write_png
+from volume_export import EXPORT_FORMATS, export_series, volume_geometry, write_numpy_sidecar
+
+
+def study_files(study_dir, args):
+    if os.path.isfile(study_dir):
+        return [study_dir]  # A single DICOM file
+    file_paths = list_dicom_files(study_dir, recursive=args.recursive)
+    if not file_paths:
+        raise ValueError("no DICOM files found")
+    return file_paths
+
+
+def study_output_dir(study_dir, args):
+    name = os.path.basename(os.path.normpath(study_dir))
+    if os.path.isfile(study_dir):
+        name = os.path.splitext(name)[0]
+    return os.path.join(args.output, name)
+
+
+def summarize(study_dir, args):
+    file_paths = study_files(study_dir, args)
+    headers = read_headers(file_paths, args.threads)
+    lines = []
+    for series in group_series(file_paths, headers):
+        _, series_headers = sort_slices([path for path, _ in series], [header for _, header in series])
+        first = series_headers[0]
+        lines.append(f"--- Series {first.get('SeriesInstanceUID', 'N/A')} ({len(series)} files)")
+        lines.append(format_details(first))
+        if args.attributes:
+            lines.append("Attributes")
+            lines.extend("\t".join(row) for row in attribute_rows(first))
+    return "\n".join(lines)
+
+
+def anonymize(study_dir, args):
+    anonymizer = BatchAnonymizer(args.prefix, study_output_dir(study_dir, args),
+                                 UIDMapper.load(args.key), args.threads)
+    records = anonymizer.run(study_files(study_dir, args))
+    failed = sum(record["status"] != "ok" for record in records)
+    return f"anonymized {len(records) - failed} files ({failed} failed) into {anonymizer.output_dir}"
+
+
+def export_thumbnails(study_dir, args):
+    _, _, volume = load_series(study_files(study_dir, args), args.threads)
+    output_dir = study_output_dir(study_dir, args)
+    os.makedirs(output_dir, exist_ok=True)
+    for index, frame in enumerate(volume):
+        write_png(os.path.join(output_dir, f"slice_{index:04d}.png"), make_thumbnail(frame, args.size))
+    return f"wrote {len(volume)} thumbnails to {output_dir}"
+
+
+def export_volume(study_dir, args):
+    file_paths, headers, volume = load_series(study_files(study_dir, args), args.threads)
+    os.makedirs(args.output, exist_ok=True)
+    base = study_output_dir(study_dir, args)
+    np.save(base + ".npy", volume)
+    write_numpy_sidecar(base + ".npy", volume.shape, volume.dtype, volume_geometry(headers), files=file_paths)
+    return f"wrote {volume.shape} {volume.dtype} volume to {base}.npy"
+
+
+def export_rescaled_volume(study_dir, args):
+    os.makedirs(args.output, exist_ok=True)
+    output_path = study_output_dir(study_dir, args) + args.format
+    export_series(study_files(study_dir, args), output_path, args.threads)
+    return f"wrote rescaled volume to {output_path}"
+
+
+COMMANDS = {
+    "summarize": summarize,
+    "anonymize": anonymize,
+    "thumbnails": export_thumbnails,
+    "volume": export_volume,
+    "export": export_rescaled_volume,
+}
+
+
+def run_study(command, study_dir, args):
+    """Run one command on one study folder; returns (study_dir, ok, text)."""
+    try:
+        return study_dir, True, COMMANDS[command](study_dir, args)
+    except Exception as e:
+        return study_dir, False, f"error: {e}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="number of study folders processed in parallel")
+    parser.add_argument("--threads", type=int, default=DEFAULT_WORKERS,
+                        help="reader threads per study folder")
+    parser.add_argument("--recursive", action="store_true", help="include files in subfolders of each study")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summarize", help="print the main DICOM groups of every series")
+    summary_parser.add_argument("--attributes", action="store_true", help="also dump every top-level attribute")
+
+    anonymize_parser = subparsers.add_parser("anonymize", help="write anonymized copies of the files")
+    anonymize_parser.add_argument("--prefix", required=True, help="prefix for anonymized values")
+    anonymize_parser.add_argument("--key", default=DEFAULT_KEY_PATH, help="anonymization key file")
+
+    thumbnail_parser = subparsers.add_parser("thumbnails", help="export one PNG thumbnail per slice")
+    thumbnail_parser.add_argument("--size", type=int, default=250, help="longest thumbnail side in pixels")
+
+    subparsers.add_parser("volume", help="export the sorted series as a .npy volume with a JSON sidecar")
+
+    export_parser = subparsers.add_parser(
+        "export", help="stream the sorted, rescaled series to a volume file with its geometry")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default=".nii.gz", help="volume file format")
+
+    for name, subparser in subparsers.choices.items():
+        subparser.add_argument("studies", nargs="+", help="study folders or single DICOM files")
+        if name != "summarize":
+            subparser.add_argument("--output", required=True, help="output folder")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    missing = [study_dir for study_dir in args.studies if not os.path.exists(study_dir)]
+    if missing:
+        parser.error(f"no such study folder or file: {', '.join(missing)}")
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processes, len(args.studies)))) as pool:
+        futures = [pool.submit(run_study, args.command, study_dir, args) for study_dir in args.studies]
+        for future in futures:
+            study_dir, ok, text = future.result()
+            failures += not ok
+            print(f"=== {study_dir}\n{text}\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
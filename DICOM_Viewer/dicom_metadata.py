@@ -0,0 +1,171 @@
+BINARY_VRS = {'OB', 'OD', 'OF', 'OL', 'OV', 'OW', 'UN'}
+MAX_BINARY_SHOWN = 64  # Longer binary values are summarized by their length
+
+
+def format_value(elem):
+    """Display string of an element's value; long binary values become a byte count."""
+    if elem.VR == 'SQ':
+        return f"{len(elem.value)} item(s)"
+    if elem.VR in BINARY_VRS and elem.value is not None and len(elem.value) > MAX_BINARY_SHOWN:
+        return f"<{len(elem.value)} bytes>"
+    return str(elem.value)
+
+
+def attribute_rows(dicom_data):
+    """Return (tag, VR, keyword, value) strings for the top-level non-sequence elements."""
+    return [(str(elem.tag), elem.VR, elem.keyword, str(elem.value))
+            for elem in dicom_data if elem.VR != 'SQ']
+
+
+class AttributeNode:
+    """One row of the attribute tree: a data element, or an item of a sequence.
+
+    Children are only created when first asked for, so sequences (e.g. the
+    per-frame functional groups of enhanced multi-frame objects) cost nothing
+    until they are expanded or searched.  `search_text` is the row's lowercase
+    tag, keyword and value; `subtree_text` adds every descendant and is kept
+    once built, so it serves as the search index for all later queries.
+    """
+
+    def __init__(self, parent=None, row=0, dataset=None, element=None, label=""):
+        self.parent = parent
+        self.row = row  # Position under the parent
+        self.dataset = dataset  # The root or a sequence item
+        self.element = element
+        self.label = label
+        self._children = None
+        self._columns = None
+        self._subtree_text = None
+
+    @classmethod
+    def root(cls, dicom_data):
+        return cls(dataset=dicom_data)
+
+    @property
+    def children(self):
+        if self._children is None:
+            if self.dataset is not None:
+                self._children = [AttributeNode(self, row, element=elem) for row, elem in enumerate(self.dataset)]
+            elif self.element is not None and self.element.VR == 'SQ':
+                self._children = [AttributeNode(self, row, dataset=item, label=f"Item {row + 1}")
+                                  for row, item in enumerate(self.element.value)]
+            else:
+                self._children = []
+        return self._children
+
+    def has_children(self):
+        """True if the node has children, without creating them."""
+        if self.dataset is not None:
+            return len(self.dataset) > 0
+        return self.element is not None and self.element.VR == 'SQ' and len(self.element.value) > 0
+
+    @property
+    def columns(self):
+        """(tag, VR, keyword, value) display strings."""
+        if self._columns is None:
+            elem = self.element
+            if elem is None:
+                self._columns = (self.label, "", "", "")
+            else:
+                self._columns = (str(elem.tag), elem.VR, elem.keyword, format_value(elem))
+        return self._columns
+
+    @property
+    def search_text(self):
+        return "\t".join(self.columns).lower()
+
+    @property
+    def subtree_text(self):
+        if self._subtree_text is None:
+            self._subtree_text = "\n".join([self.search_text] + [child.subtree_text for child in self.children])
+        return self._subtree_text
+
+
+def format_details(dicom_data):
+    """Summarize the main DICOM groups (Patient, Station, Study, ...) as text."""
+    def format_date(date_str):
+        if len(date_str) == 8:  # e.g., "YYYYMMDD"
+            return f"{date_str[4:6]}/{date_str[6:8]}/{date_str[:4]}"
+        return date_str
+
+    def format_time(time_str):
+        if len(time_str) >= 6:  # e.g., "HHMMSS"
+            return f"{time_str[:2]}:{time_str[2:4]}:{time_str[4:6]}"
+        return time_str
+
+    details = []
+
+    # Patient Information
+    patient_details = [
+        f"Patient's Name: {dicom_data.get('PatientName', 'N/A')}",
+        f"Patient ID: {dicom_data.get('PatientID', 'N/A')}",
+        f"Patient's Sex: {dicom_data.get('PatientSex', 'N/A')}",
+        f"Patient's Birth Date: {format_date(dicom_data.get('PatientBirthDate', 'N/A'))}",
+    ]
+    details.append("Patient\n" + "\n".join(patient_details) + "\n")
+
+    # Station Information
+    station_details = [
+        f"Manufacturer: {dicom_data.get('Manufacturer', 'N/A')}",
+        f"Manufacturer's Model Name: {dicom_data.get('ManufacturerModelName', 'N/A')}",
+        f"Station Name: {dicom_data.get('StationName', 'N/A')}",
+    ]
+    details.append("Station\n" + "\n".join(station_details) + "\n")
+
+    # Study Information
+    study_details = [
+        f"Study Instance UID: {dicom_data.get('StudyInstanceUID', 'N/A')}",
+        f"Study Date: {format_date(dicom_data.get('StudyDate', 'N/A'))}",
+        f"Study Time: {format_time(dicom_data.get('StudyTime', 'N/A'))}",
+        f"Study ID: {dicom_data.get('StudyID', 'N/A')}",
+        f"Accession Number: {dicom_data.get('AccessionNumber', 'N/A')}",
+        f"Study Description: {dicom_data.get('StudyDescription', 'N/A')}",
+    ]
+    details.append("Study\n" + "\n".join(study_details) + "\n")
+
+    # Series Information
+    series_details = [
+        f"Series Instance UID: {dicom_data.get('SeriesInstanceUID', 'N/A')}",
+        f"Series Date: {format_date(dicom_data.get('SeriesDate', 'N/A'))}",
+        f"Series Time: {format_time(dicom_data.get('SeriesTime', 'N/A'))}",
+        f"Series Number: {dicom_data.get('SeriesNumber', 'N/A')}",
+        f"Modality: {dicom_data.get('Modality', 'N/A')}",
+        f"Referring Physician's Name: {dicom_data.get('ReferringPhysicianName', 'N/A')}",
+        f"Institution Name: {dicom_data.get('InstitutionName', 'N/A')}",
+        f"Institutional Department Name: {dicom_data.get('InstitutionalDepartmentName', 'N/A')}",
+        f"Body Part Examined: {dicom_data.get('BodyPartExamined', 'N/A')}",
+    ]
+    details.append("Series\n" + "\n".join(series_details) + "\n")
+
+    # DICOM Object Information
+    dicom_object_details = [
+        f"SOP Instance UID: {dicom_data.get('SOPInstanceUID', 'N/A')}",
+        f"Image Type: {dicom_data.get('ImageType', 'N/A')}",
+        f"SOP Class UID: {dicom_data.get('SOPClassUID', 'N/A')}",
+        f"Transfer Syntax UID: {dicom_data.get('TransferSyntaxUID', 'N/A')}",
+        f"Instance Number: {dicom_data.get('InstanceNumber', 'N/A')}",
+        f"Image Comments: {dicom_data.get('ImageComments', 'N/A')}",
+        f"Photometric Interpretation: {dicom_data.get('PhotometricInterpretation', 'N/A')}",
+        f"Samples per Pixel: {dicom_data.get('SamplesPerPixel', 'N/A')}",
+        f"Pixel Representation: {dicom_data.get('PixelRepresentation', 'N/A')}",
+        f"Columns: {dicom_data.get('Columns', 'N/A')}",
+        f"Rows: {dicom_data.get('Rows', 'N/A')}",
+        f"Bits Allocated: {dicom_data.get('BitsAllocated', 'N/A')}",
+        f"Bits Stored: {dicom_data.get('BitsStored', 'N/A')}",
+    ]
+    details.append("DICOM Object\n" + "\n".join(dicom_object_details))
+
+    # Image Plane Information
+    pixel_spacing = dicom_data.get('PixelSpacing', ['N/A', 'N/A'])
+    image_plane_details = [
+        f"Pixel Spacing: {', '.join(map(str, pixel_spacing))}"
+    ]
+    details.append("Image Plane\n" + "\n".join(image_plane_details) + "\n")
+
+    # Image Acquisition Information
+    image_acquisition_details = [
+        f"KVP: {dicom_data.get('KVP', 'N/A')}",
+    ]
+    details.append("Image Acquisition\n" + "\n".join(image_acquisition_details))
+
+    return "\n\n".join(details)
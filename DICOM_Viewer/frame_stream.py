@@ -0,0 +1,156 @@
+import struct
+import threading
+
+import pydicom
+
+try:
+    # Frame-level decoding needs pydicom 3
+    from pydicom.pixels import as_pixel_options, get_decoder
+except ImportError:
+    get_decoder = None
+
+from series_loader import pixel_dtype
+
+DEFAULT_READ_AHEAD = 32  # Frames decoded ahead of the playback position
+STREAM_THRESHOLD = 64 * 1024 ** 2  # Multi-frame files decoding to more than this are streamed
+
+
+def can_stream(header):
+    """True if a multi-frame file is large enough to stream and pydicom can decode single frames."""
+    return get_decoder is not None and decoded_size(header) > STREAM_THRESHOLD
+
+
+def decoded_size(header):
+    """Size in bytes of a file's pixel data once decoded."""
+    frames = int(header.get("NumberOfFrames", 1) or 1)
+    samples = int(header.get("SamplesPerPixel", 1))
+    return frames * int(header.Rows) * int(header.Columns) * samples * pixel_dtype(header).itemsize
+
+
+PIXEL_KEYWORDS = {(0x7FE0, 0x0010): "PixelData", (0x7FE0, 0x0008): "FloatPixelData",
+                  (0x7FE0, 0x0009): "DoubleFloatPixelData"}
+
+
+class FrameReader:
+    """Decodes single frames of a multi-frame file, parsing its header only once.
+
+    The header (with its per-frame functional groups) is read when the reader
+    is created; each frame is then decoded straight from the pixel data's file
+    offset.  Indexing opens the file for the call, so several threads can read
+    frames at once; `read` reuses a file the caller keeps open.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            header = pydicom.dcmread(f, stop_before_pixels=True)  # Leaves f at the pixel data element
+            syntax = header.file_meta.TransferSyntaxUID
+            endian = "<" if syntax.is_little_endian else ">"
+            group, element = struct.unpack(f"{endian}HH", f.read(4))
+            if syntax.is_implicit_VR:
+                f.read(4)  # Length
+                vr = None
+            else:
+                vr = f.read(4)[:2].decode()  # VR and two reserved bytes, then a 32-bit length
+                f.read(4)
+            self.offset = f.tell()
+        self.count = int(header.get("NumberOfFrames", 1) or 1)
+        self.decoder = get_decoder(syntax)
+        self.options = as_pixel_options(header, transfer_syntax_uid=syntax, pixel_keyword=PIXEL_KEYWORDS[group, element])
+        if vr is not None:
+            self.options["pixel_vr"] = vr
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        with open(self.file_path, "rb") as f:
+            return self.read(f, range(self.count)[index])
+
+    def read(self, f, index):
+        f.seek(self.offset)
+        return self.decoder.as_array(f, index=index, **self.options)[0]
+
+
+class StreamedFrames:
+    """The frames of a multi-frame file, decoded on demand instead of all at once.
+
+    Behaves like a read-only sequence of frames.  Each frame is pulled from the
+    (possibly encapsulated) pixel data on its own, and a worker thread keeps the
+    `read_ahead` frames following the last one requested in a ring buffer, so
+    playback can start on the first frame and memory stays bounded.  A frame
+    that is not buffered (a jump) is decoded directly and the read-ahead moves
+    there.  Indices wrap around, matching looped cine playback.  Random access
+    that should not move the read-ahead (e.g. thumbnails) goes through
+    `reader` instead.
+    """
+
+    def __init__(self, file_path, header, read_ahead=DEFAULT_READ_AHEAD):
+        self.file_path = file_path
+        self.reader = FrameReader(file_path)
+        self.count = int(header.NumberOfFrames)
+        self.read_ahead = max(1, min(read_ahead, self.count))
+        shape = (self.count, int(header.Rows), int(header.Columns))
+        samples = int(header.get("SamplesPerPixel", 1))
+        self.shape = shape + (samples,) if samples > 1 else shape
+        self.buffer = {}  # index -> frame
+        self.cursor = 0  # Last requested frame
+        self.stopped = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.decode_ahead, daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        index = range(self.count)[index]
+        with self.condition:
+            self.cursor = index
+            self.prune()
+            frame = self.buffer.get(index)
+            self.condition.notify_all()
+        if frame is None:
+            frame = self.reader[index]
+            with self.condition:
+                self.buffer[index] = frame
+        return frame
+
+    def ahead_of_cursor(self, index):
+        return (index - self.cursor) % self.count
+
+    def prune(self):
+        """Drop frames outside the read-ahead window (lock held)."""
+        for index in [i for i in self.buffer if self.ahead_of_cursor(i) >= self.read_ahead]:
+            del self.buffer[index]
+
+    def next_missing(self):
+        """The nearest frame ahead of the cursor that is not buffered yet (lock held)."""
+        for offset in range(self.read_ahead):
+            index = (self.cursor + offset) % self.count
+            if index not in self.buffer:
+                return index
+        return None
+
+    def decode_ahead(self):
+        with open(self.file_path, "rb") as f:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.stopped or self.next_missing() is not None)
+                    if self.stopped:
+                        return
+                    index = self.next_missing()
+                try:
+                    frame = self.reader.read(f, index)
+                except Exception:
+                    return  # Leave the frame to __getitem__, which reports the error
+                with self.condition:
+                    if self.ahead_of_cursor(index) < self.read_ahead:
+                        self.buffer[index] = frame
+
+    def close(self):
+        with self.condition:
+            self.stopped = True
+            self.buffer.clear()
+            self.condition.notify_all()
+        self.thread.join()
@@ -1,17 +1,34 @@
 import os
 import sys
-import random
-import string
+import time
 
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QImage, QPixmap, QPixmapCache
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QAction, QFileDialog, QTableWidget,
-    QTableWidgetItem, QVBoxLayout, QHBoxLayout, QLineEdit, QDialog, QLabel, QInputDialog,QPushButton,QScrollArea,
-    QStatusBar, QGridLayout,QWidget, QLabel,QMessageBox, QInputDialog
+    QApplication, QMainWindow, QAction, QFileDialog,
+    QVBoxLayout, QHBoxLayout, QLineEdit, QDialog, QLabel, QInputDialog,QPushButton,
+    QStatusBar, QWidget, QLabel, QInputDialog, QListView, QTreeView, QTreeWidget,
+    QTreeWidgetItem
+)
+from PyQt5.QtCore import (
+    Qt, QTimer, QThread, pyqtSignal, QObject, QRunnable, QThreadPool, QAbstractListModel, QAbstractItemModel,
+    QModelIndex, QSize, QSortFilterProxyModel
 )
-from PyQt5.QtCore import Qt, QTimer
 import pydicom
 import numpy as np
+from series_loader import (
+    list_dicom_files, read_headers, largest_series, require_single_frame, series_geometry, allocate_volume,
+    decode_series
+)
+from volume_cache import VolumeCache
+from thumbnails import make_thumbnail
+from dicom_metadata import AttributeNode, format_details
+from windowing import WindowLevel
+from frame_stream import StreamedFrames, can_stream
+from playback import DEFAULT_FRAME_INTERVAL, PlaybackClock, frame_interval_from_header
+from study_index import DEFAULT_INDEX_PATH, StudyIndex
+from header_cache import HeaderCache
+from volume_export import export_series, write_volume
+from anonymizer import AUDIT_FILE_NAME, BatchAnonymizer, UIDMapper
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
@@ -35,14 +52,20 @@ class DICOMViewer(QMainWindow):
         self.canvas = DICOMImageCanvas(self)  # Create canvas as a class attribute
         self.main_layout.addWidget(self.canvas)  # Add the canvas to the layout
 
-        # Step 4: Scroll area for grid display
-        self.grid_scroll_area = QScrollArea(self)
-        self.grid_scroll_area.setWidgetResizable(True)
-        self.grid_container = QWidget()
-        self.grid_layout = QGridLayout(self.grid_container)
-        self.grid_scroll_area.setWidget(self.grid_container)
-        self.main_layout.addWidget(self.grid_scroll_area)
-        self.grid_scroll_area.setVisible(False)  # Hide grid initially
+        # Step 4: Virtualized tile view; only tiles in the viewport are rendered
+        self.tile_model = SliceThumbnailModel(self)
+        self.tile_view = QListView(self)
+        self.tile_view.setViewMode(QListView.IconMode)
+        self.tile_view.setResizeMode(QListView.Adjust)
+        self.tile_view.setMovement(QListView.Static)
+        self.tile_view.setUniformItemSizes(True)
+        self.tile_view.setIconSize(QSize(TILE_SIZE, TILE_SIZE))
+        self.tile_view.setGridSize(QSize(TILE_SIZE, TILE_SIZE))
+        self.tile_view.setSpacing(0)  # Tiles touch each other
+        self.tile_view.setModel(self.tile_model)
+        self.tile_view.clicked.connect(lambda index: self.show_slice_from_tile(index.row()))
+        self.main_layout.addWidget(self.tile_view)
+        self.tile_view.setVisible(False)  # Hide grid initially
 
         # Step 5: Toolbar
         toolbar = self.addToolBar("Main Toolbar")
@@ -57,6 +80,11 @@ class DICOMViewer(QMainWindow):
         open_folder_action.triggered.connect(self.open_dicom_folder)
         toolbar.addAction(open_folder_action)
 
+        # Series Browser Action
+        browser_action = QAction(QIcon(r"F:\Projects\DicomViewer\pythonProject\Icons\folder.png"),"Series Browser", self)
+        browser_action.triggered.connect(self.show_series_browser)
+        toolbar.addAction(browser_action)
+
         # Show Attributes Action
         attributes_action = QAction(QIcon(r"F:\Projects\DicomViewer\pythonProject\Icons\ui.png"),"Show Attributes", self)
         attributes_action.triggered.connect(self.show_attributes_window)
@@ -77,6 +105,11 @@ class DICOMViewer(QMainWindow):
         anonymize_action.triggered.connect(self.anonymize_dicom)
         toolbar.addAction(anonymize_action)
 
+        # Export Volume Action
+        export_action = QAction(QIcon(r"F:\Projects\DicomViewer\pythonProject\Icons\upload-file.png"),"Export Volume", self)
+        export_action.triggered.connect(self.export_volume)
+        toolbar.addAction(export_action)
+
         # Toggle Tiles Action
         self.toggle_tiles_action = QAction(QIcon(r"F:\Projects\DicomViewer\pythonProject\Icons\grid.png"),"Show Tiles", self)
         self.toggle_tiles_action.setEnabled(False)  # Initially disabled
@@ -90,58 +123,83 @@ class DICOMViewer(QMainWindow):
         # Data variables
         self.dicom_data = None
         self.dicom_files = []  # List to store paths of all DICOM files in the folder
-        self.dicom_frames = []  # Store multiple frames
+        self.single_file = None  # Path of a file opened on its own
+        self.dicom_frames = np.empty((0, 0, 0))  # (N, rows, cols) volume of frames/slices
+        self.frames_loaded = np.zeros(0, dtype=bool)  # Which slices of dicom_frames are decoded
+        self.series_loader = None  # Background thread loading a folder
+        self.volume_cache = VolumeCache()  # Decoded volumes of previously opened series
+        self.header_cache = HeaderCache()  # Header-only datasets for the metadata windows
+        self.anonymize_thread = None  # Background batch anonymization
+        self.series_browser = None  # Series of the indexed folders, created on first use
+        self.export_thread = None  # Background volume export
         self.video_mode = False
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.play_video)
+        self.playback_clock = None  # Decides which frame is due while playing
+        self.playback_status_time = 0.0
         self.current_frame = 0
         self.current_mode = "single"  # Can be "single" or "tiles"
         self.total_slices = 0
-        self.columns = 5  # Fixed number of columns in the grid
 
     def open_dicom_file(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open DICOM File", "", "DICOM Files (*.dcm)")
         if file_name:
+            self.stop_series_loader()
+            self.release_frames()
             try:
-                self.dicom_data = pydicom.dcmread(file_name)
-
-                # Prompt for anonymization
-                reply = QMessageBox.question(
-                    self,
-                    "Anonymize DICOM",
-                    "Would you like to anonymize this DICOM file?",
-                    QMessageBox.Yes | QMessageBox.No,
-                )
-                if reply == QMessageBox.Yes:
-                    prefix, ok = QInputDialog.getText(self, "Anonymization Prefix", "Enter prefix for anonymization:")
-                    if ok and prefix:
-                        self.anonymize_file(self.dicom_data, prefix)
-                        self.dicom_data.save_as(file_name)
-                        self.status_bar.showMessage("DICOM file anonymized and saved.", 5000)
+                self.dicom_files = []
+                self.single_file = None
+                self.dicom_data = self.header_cache.get(file_name)
+                self.current_frame = 0
 
                 # Check for cine DICOM or single-frame
                 if hasattr(self.dicom_data, "NumberOfFrames") and self.dicom_data.NumberOfFrames > 1:
-                    self.dicom_frames = [self.dicom_data.pixel_array[i] for i in range(self.dicom_data.NumberOfFrames)]
+                    self.dicom_frames = self.load_multiframe_pixels(file_name)
+                    self.frames_loaded = np.ones(len(self.dicom_frames), dtype=bool)
                     self.video_mode = True
-                    self.timer.start(100)
+                    self.start_playback()
                     self.status_bar.showMessage("Cine DICOM loaded.", 5000)
                 else:
-                    self.dicom_frames = [self.dicom_data.pixel_array]
+                    self.dicom_frames = pydicom.dcmread(file_name).pixel_array[np.newaxis]
+                    self.frames_loaded = np.ones(1, dtype=bool)
                     self.video_mode = False
-                    self.timer.stop()
+                    self.stop_playback()
                     self.status_bar.showMessage("Single-frame DICOM loaded.", 5000)
 
+                # One window/level for the whole file, so frames never re-normalize.  Without
+                # one in the header it comes from the first frame: scanning a memory-mapped
+                # or streamed volume here would read the whole file on the GUI thread
+                self.canvas.set_window_level(WindowLevel.from_dataset(self.dicom_data, self.dicom_frames[0]))
+                self.single_file = file_name  # Anonymized through the toolbar action, like a folder
                 self.update_display()
             except Exception as e:
                 self.status_bar.showMessage(f"Failed to load DICOM file: {e}", 5000)
 
+    def load_multiframe_pixels(self, file_name):
+        """Return a multi-frame file's (N, rows, cols) frames.
+
+        Frames are memory-mapped from the cache when possible; large files are
+        otherwise streamed frame by frame instead of being decoded up front.
+        """
+        key = self.volume_cache.key_for(self.dicom_data.get("SeriesInstanceUID", ""), [file_name])
+        cached = self.volume_cache.load(key)
+        if cached is not None:
+            return cached[0]
+        if can_stream(self.dicom_data):
+            return StreamedFrames(file_name, self.dicom_data)
+
+        frames = pydicom.dcmread(file_name).pixel_array  # Already an (N, rows, cols) array
+        self.volume_cache.store(key, frames, {"series_uid": str(self.dicom_data.get("SeriesInstanceUID", "")),
+                                              "files": [file_name]})
+        return frames
+
     def open_dicom_folder(self):
         # Open a dialog to select a DICOM folder
         folder_path = QFileDialog.getExistingDirectory(self, "Select DICOM Folder")
         if folder_path:
             # List all DICOM files in the folder
-            dicom_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if
-                           f.endswith(('.dcm'))]
+            dicom_files = list_dicom_files(folder_path)
             if dicom_files:
                 # Save file paths and load the DICOM frames
                 self.dicom_files = dicom_files  # Store file paths
@@ -151,100 +209,256 @@ class DICOMViewer(QMainWindow):
                 self.status_bar.showMessage("No DICOM files found in the selected folder.", 5000)
 
     def load_dicom_frames(self, file_paths):
-        try:
-            self.dicom_frames = [pydicom.dcmread(f).pixel_array for f in file_paths]
-            self.dicom_data = pydicom.dcmread(file_paths[0])  # Metadata from the first file
-            self.current_frame = 0
-            self.video_mode = False
-            self.timer.stop()
-            self.update_display()
+        # Stop a folder that is still loading before starting a new one
+        self.stop_series_loader()
+        self.release_frames()
 
-            # **Enable the "Show Tiles" button after frames are loaded**
-            if self.dicom_frames:
-                self.toggle_tiles_action.setEnabled(True)
+        self.dicom_frames = np.empty((0, 0, 0))  # Allocated once the headers are read
+        self.frames_loaded = np.zeros(0, dtype=bool)
+        self.total_slices = 0
+        self.current_frame = 0
+        self.video_mode = False
+        self.stop_playback()
+        self.toggle_tiles_action.setEnabled(False)
+
+        self.canvas.setVisible(True)
+        self.tile_view.setVisible(False)
+        self.current_mode = "single"
+        self.toggle_tiles_action.setText("Show Tiles")
+
+        # Headers and pixel data are read on a worker thread so the UI stays responsive
+        self.series_loader = SeriesLoaderThread(file_paths, self.volume_cache, self.header_cache, self)
+        self.series_loader.headers_loaded.connect(self.on_series_headers_loaded)
+        self.series_loader.slice_loaded.connect(self.on_series_slice_loaded)
+        self.series_loader.volume_loaded.connect(self.on_series_volume_loaded)
+        self.series_loader.progress.connect(self.on_series_progress)
+        self.series_loader.failed.connect(self.on_series_failed)
+        self.series_loader.finished.connect(self.on_series_finished)
+        self.series_loader.start()
+        self.status_bar.showMessage(f"Reading {len(file_paths)} headers...")
+
+    def stop_series_loader(self):
+        if self.series_loader is not None:
+            self.series_loader.requestInterruption()
+            self.series_loader.wait()
+            self.series_loader = None
+
+    def release_frames(self):
+        # Stop the read-ahead thread of a streamed cine file
+        if isinstance(self.dicom_frames, StreamedFrames):
+            self.dicom_frames.close()
+
+    def on_series_headers_loaded(self, file_paths, headers, volume):
+        if self.sender() is not self.series_loader:
+            return
+        self.dicom_files = file_paths  # Sorted slice order of the loaded series
+        self.dicom_data = headers[0]  # Metadata from the first slice, without pixel data
+        self.dicom_frames = volume  # Filled in place by the loader thread
+        self.frames_loaded = np.zeros(len(volume), dtype=bool)
+        self.total_slices = len(volume)
+        # The header's window, or one taken from the first slice shown
+        self.canvas.set_window_level(WindowLevel.from_dataset(self.dicom_data))
+
+    def on_series_slice_loaded(self, index):
+        if self.sender() is not self.series_loader:
+            return
+        self.frames_loaded[index] = True
+        if index == self.current_frame and self.current_mode == "single":
+            self.update_display()
 
-            self.total_slices = len(self.dicom_frames)
+    def on_series_volume_loaded(self):
+        if self.sender() is not self.series_loader:
+            return
+        self.frames_loaded[:] = True
+        if self.current_mode == "single":
+            self.update_display()
 
-            # Display the first slice as 2D
-            self.canvas.display_image(self.dicom_frames[0])
-            self.canvas.setVisible(True)
-            self.grid_scroll_area.setVisible(False)
-            self.current_mode = "single"
+    def on_series_progress(self, loaded, total):
+        self.status_bar.showMessage(f"Loading slices {loaded}/{total}...")
 
-            self.status_bar.showMessage(f"Loaded {len(file_paths)} files from folder.", 5000)
-        except Exception as e:
-            self.status_bar.showMessage(f"Error loading folder: {e}", 5000)
+    def on_series_failed(self, message):
+        self.status_bar.showMessage(f"Error loading folder: {message}", 5000)
 
+    def on_series_finished(self):
+        loader = self.sender()
+        if loader is not self.series_loader:
+            return
+        self.series_loader = None
+        if loader.error is None:
+            # **Enable the "Show Tiles" button after frames are loaded**
+            self.toggle_tiles_action.setEnabled(True)
+            message = f"Loaded {self.total_slices} files from folder"
+            message += " (from cache)." if loader.from_cache else "."
+            if loader.skipped_files:
+                message += f" {loader.skipped_files} files from other series were skipped."
+            self.status_bar.showMessage(message, 5000)
+
+    def closeEvent(self, event):
+        self.stop_series_loader()
+        self.release_frames()
+        if self.anonymize_thread is not None:
+            self.anonymize_thread.requestInterruption()
+            self.anonymize_thread.wait()
+        if self.series_browser is not None:
+            self.series_browser.close()
+        if self.export_thread is not None:
+            self.export_thread.requestInterruption()
+            self.export_thread.wait()
+        super().closeEvent(event)
 
     def toggle_video_mode(self):
         if len(self.dicom_frames) > 1:
             self.video_mode = not self.video_mode
             if self.video_mode:
-                self.timer.start(100)  # 10 FPS
+                self.start_playback()
             else:
-                self.timer.stop()
+                self.stop_playback()
+
+    def start_playback(self):
+        # Play at the header's FrameTime/CineRate (10 FPS by default), measured on a monotonic clock
+        frame_interval = frame_interval_from_header(self.dicom_data) if self.dicom_data is not None else DEFAULT_FRAME_INTERVAL
+        self.playback_clock = PlaybackClock(len(self.dicom_frames), frame_interval)
+        self.playback_clock.start(self.current_frame)
+        self.playback_status_time = time.monotonic()
+        # Tick faster than the frame rate so a due frame is picked up promptly
+        self.timer.start(max(1, int(frame_interval * 1000 / 4)))
+
+    def stop_playback(self):
+        self.timer.stop()
+        self.playback_clock = None
 
     def play_video(self):
-        self.current_frame = (self.current_frame + 1) % len(self.dicom_frames)
+        if self.playback_clock is None:
+            return
+        frame = self.playback_clock.advance()
+        if frame is None:
+            return  # The current frame is still due
+        self.current_frame = frame
         self.update_display()
 
+        # Warm up the frames due next while this one is on screen
+        if isinstance(self.dicom_frames, np.memmap):
+            QThreadPool.globalInstance().start(
+                FramePrefetchTask(self.dicom_frames, self.playback_clock.next_frames(PREFETCH_FRAMES)))
+
+        now = time.monotonic()
+        if now - self.playback_status_time >= 1.0:
+            self.playback_status_time = now
+            self.status_bar.showMessage(
+                f"Playing at {self.playback_clock.achieved_fps:.1f} of {self.playback_clock.target_fps:.1f} FPS, "
+                f"{self.playback_clock.dropped} frames dropped", 2000)
+
     def update_display(self):
-        self.canvas.display_image(self.dicom_frames[self.current_frame])
+        if self.frames_loaded[self.current_frame]:  # Slices of a folder may still be loading
+            self.canvas.display_image(self.dicom_frames[self.current_frame])
+
+    def export_volume(self):
+        if not self.dicom_files:
+            self.status_bar.showMessage("Open a DICOM folder to export first.", 5000)
+            return
+        if self.export_thread is not None:
+            self.status_bar.showMessage("An export is already running.", 5000)
+            return
+
+        output_path, name_filter = QFileDialog.getSaveFileName(
+            self, "Export Volume", "", "NIfTI (*.nii.gz);;MetaImage (*.mha);;NumPy (*.npy)")
+        if not output_path:
+            return
+        extension = name_filter[name_filter.index("*") + 1:-1]
+        if not output_path.lower().endswith(extension):
+            output_path += extension
+
+        # Slices already decoded by the viewer are written as they are instead of being decoded again
+        frames = self.dicom_frames if self.frames_loaded.all() and len(self.frames_loaded) == len(self.dicom_files) else None
+        self.export_thread = ExportThread(self.dicom_files, output_path, self.header_cache, frames, self)
+        self.export_thread.progress.connect(
+            lambda done, total: self.status_bar.showMessage(f"Exporting slice {done}/{total}..."))
+        self.export_thread.finished.connect(self.on_export_finished)
+        self.export_thread.start()
+
+    def on_export_finished(self):
+        thread, self.export_thread = self.export_thread, None
+        if thread.error is not None:
+            self.status_bar.showMessage(f"Export failed: {thread.error}", 5000)
+        elif thread.completed:
+            self.status_bar.showMessage(f"Volume exported to {thread.output_path}", 5000)
 
     def anonymize_dicom(self):
+        file_paths = self.dicom_files or ([self.single_file] if self.single_file else [])
+        if not file_paths:
+            self.status_bar.showMessage("Open a DICOM file or folder to anonymize first.", 5000)
+            return
+        if self.anonymize_thread is not None:
+            self.status_bar.showMessage("Anonymization is already running.", 5000)
+            return
+
         # Prompt user for prefix
         prefix, ok = QInputDialog.getText(self, "Anonymization Prefix", "Enter prefix for anonymization:")
         if ok and prefix:
-            for file_path in self.dicom_files:
-                try:
-                    dicom_data = pydicom.dcmread(file_path)
-                    self.anonymize_file(dicom_data, prefix)
-                    dicom_data.save_as(file_path)
-                    print(f"Anonymized {file_path}")
-                except Exception as e:
-                    print(f"Error anonymizing {file_path}: {e}")
-
-    def anonymize_file(self, dicom_data, prefix):
-        # Critical DICOM tags to anonymize
-        critical_tags = [
-            'PatientName', 'PatientID', 'PatientBirthDate', 'PatientSex',
-            'IssuerOfPatientID', 'StudyInstanceUID', 'SeriesInstanceUID','InstitutionName','InstitutionAddress','ReferringPhysicianName'
-        ]
-
-        # Random string generator
-        def generate_random_string(length=8):
-            return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-
-        # Anonymize each critical tag
-        for tag in critical_tags:
-            if tag in dicom_data:
-                original_value = dicom_data[tag].value
-                random_value = prefix + generate_random_string(6)
-                dicom_data[tag].value = random_value
-                print(f"Anonymized {tag}: {original_value} -> {random_value}")
+            # Anonymized copies go to a separate folder instead of overwriting the originals
+            output_dir = QFileDialog.getExistingDirectory(self, "Select Output Folder for Anonymized Files")
+            if not output_dir:
+                return
+
+            # One mapper per batch keeps every UID consistent across the files and across runs
+            anonymizer = BatchAnonymizer(prefix, output_dir, UIDMapper.load())
+            self.anonymize_thread = AnonymizeThread(anonymizer, file_paths, self)
+            self.anonymize_thread.progress.connect(
+                lambda done, total: self.status_bar.showMessage(f"Anonymizing {done}/{total}..."))
+            self.anonymize_thread.finished.connect(self.on_anonymize_finished)
+            self.anonymize_thread.start()
+
+    def on_anonymize_finished(self):
+        thread, self.anonymize_thread = self.anonymize_thread, None
+        if thread.error is not None:
+            self.status_bar.showMessage(f"Anonymization failed: {thread.error}", 5000)
+            return
+        failed = sum(record["status"] != "ok" for record in thread.records)
+        self.status_bar.showMessage(
+            f"Anonymized {len(thread.records) - failed} files ({failed} failed). "
+            f"Audit log: {os.path.join(thread.anonymizer.output_dir, AUDIT_FILE_NAME)}", 10000)
+
+    def show_series_browser(self):
+        if self.series_browser is None:
+            self.series_browser = SeriesBrowserWindow(self, header_cache=self.header_cache)
+            self.series_browser.series_selected.connect(self.open_indexed_series)
+        self.series_browser.show()
+        self.series_browser.raise_()
+
+    def open_indexed_series(self, file_paths):
+        self.dicom_files = file_paths
+        self.load_dicom_frames(file_paths)
+
+    def current_header(self):
+        """Header of the slice on screen (of the file, for single files), without pixel data."""
+        if len(self.dicom_files) == len(self.frames_loaded) > self.current_frame:
+            return self.header_cache.get(self.dicom_files[self.current_frame])
+        return self.dicom_data
 
     def show_attributes_window(self):
-        if not self.dicom_data:
+        header = self.current_header()
+        if header is None:
             return
 
-        self.attributes_window = DICOMAttributesWindow(self.dicom_data)
+        self.attributes_window = DICOMAttributesWindow(header)
         self.attributes_window.show()
 
     def show_details_window(self):
-        if not self.dicom_data:
+        header = self.current_header()
+        if header is None:
             return
 
-        self.details_window = DICOMDetailsWindow(self.dicom_data)
+        self.details_window = DICOMDetailsWindow(header)
         self.details_window.show()
 
     def display_single_slice(self, index=0):
             """Display a single DICOM slice."""
-            if not self.dicom_frames:
+            if len(self.dicom_frames) == 0:
                 return
 
             self.canvas.display_image(self.dicom_frames[index])
             self.canvas.setVisible(True)
-            self.grid_scroll_area.setVisible(False)
+            self.tile_view.setVisible(False)
             self.current_mode = "single"
             self.toggle_tiles_action.setText("Show Tiles")
 
@@ -252,43 +466,22 @@ class DICOMViewer(QMainWindow):
         """Toggle between tiles view and single-slice view."""
         if self.current_mode == "single":
             # Switch to tiles view
-            if not self.dicom_frames:
+            if len(self.dicom_frames) == 0:
                 return
 
-            # Clear existing items from grid
-            for i in reversed(range(self.grid_layout.count())):
-                widget = self.grid_layout.itemAt(i).widget()
-                if widget:
-                    widget.deleteLater()
-
-            # Set spacing and margins to 0 to make tiles touch each other
-            self.grid_layout.setSpacing(0)  # Remove spacing between tiles
-            self.grid_layout.setContentsMargins(0, 0, 0, 0)  # Remove margins around the grid
-
-            num_slices = len(self.dicom_frames)
-            num_rows = int(np.ceil(num_slices / self.columns))
-
-            for idx, frame in enumerate(self.dicom_frames):
-                row = idx // self.columns
-                col = idx % self.columns
-
-                # Create and add new canvas for each slice
-                canvas = DICOMImageCanvas(self)
-                canvas.display_image(frame)
-                canvas.setFixedSize(250, 250)  # Increase tile size to 250×250 pixels
-
-                # Connect the canvas click event to show the slice
-                canvas.mousePressEvent = lambda event, index=idx: self.show_slice_from_tile(index)
-                self.grid_layout.addWidget(canvas, row, col)
+            # Thumbnails are rendered lazily as tiles scroll into view.  Streamed frames
+            # are read through their own reader, so the tiles don't move the playback read-ahead
+            frames = self.dicom_frames.reader if isinstance(self.dicom_frames, StreamedFrames) else self.dicom_frames
+            self.tile_model.set_frames(frames, self.canvas.window_level)
 
             self.canvas.setVisible(False)  # Hide single-slice view
-            self.grid_scroll_area.setVisible(True)  # Show tiles view
+            self.tile_view.setVisible(True)  # Show tiles view
             self.current_mode = "tiles"
             self.toggle_tiles_action.setText("Show Single Slice")
         else:
             # Switch to single-slice view
             self.canvas.setVisible(True)
-            self.grid_scroll_area.setVisible(False)
+            self.tile_view.setVisible(False)
             self.current_mode = "single"
             self.toggle_tiles_action.setText("Show Tiles")
 
@@ -306,11 +499,512 @@ class DICOMImageCanvas(FigureCanvas):
         self.setParent(parent)
         self.ax.axis('off')
 
+        # The image artist is created once and only has its data swapped afterwards.
+        # It is animated, so full draws leave it out and it is blitted on top of a
+        # cached background instead.
+        self.image_artist = None
+        self.background = None
+        self.mpl_connect('draw_event', self.on_draw)
+
+        # Grayscale frames go through a fixed window/level lookup table instead of
+        # being autoscaled per frame; right-drag adjusts the window interactively.
+        self.window_level = None
+        self.pixel_array = None  # Last raw frame, re-windowed while dragging
+        self.drag_start = None
+        self.mpl_connect('button_press_event', self.on_press)
+        self.mpl_connect('motion_notify_event', self.on_motion)
+        self.mpl_connect('button_release_event', self.on_release)
+
+    def set_window_level(self, window_level):
+        """Use a WindowLevel for the following frames; None picks one from the next frame's range."""
+        self.window_level = window_level
+
     def display_image(self, pixel_array):
-        self.ax.clear()
-        self.ax.imshow(pixel_array, cmap='gray')
-        self.ax.axis('off')
-        self.draw()
+        self.pixel_array = pixel_array
+        if pixel_array.ndim == 2:
+            if self.window_level is None:
+                self.window_level = WindowLevel.from_dataset({}, pixel_array)
+            pixel_array = self.window_level.apply(pixel_array)
+
+        if self.image_artist is None or self.image_artist.get_array().shape != pixel_array.shape:
+            # First frame, or a new image size: rebuild the axes once
+            self.ax.clear()
+            self.image_artist = self.ax.imshow(pixel_array, cmap='gray', vmin=0, vmax=255, animated=True)
+            self.ax.axis('off')
+            self.draw()
+            return
+
+        self.image_artist.set_data(pixel_array)
+        if self.background is None:
+            self.draw()
+            return
+        self.restore_region(self.background)
+        self.ax.draw_artist(self.image_artist)
+        self.blit(self.ax.bbox)
+
+    def on_draw(self, event):
+        # Cache everything but the image after each full redraw (first show, resize)
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        if self.image_artist is not None:
+            self.ax.draw_artist(self.image_artist)
+
+    def on_press(self, event):
+        if event.button == 3 and self.window_level is not None and self.pixel_array is not None:
+            self.drag_start = (event.x, event.y, self.window_level.center, self.window_level.width)
+
+    def on_motion(self, event):
+        if self.drag_start is None or event.x is None:
+            return
+        # Horizontal drag changes the width (contrast), vertical the center (brightness)
+        x, y, center, width = self.drag_start
+        step = width / 200.0
+        self.window_level.set_window(center - (event.y - y) * step, width + (event.x - x) * step)
+        self.display_image(self.pixel_array)
+
+    def on_release(self, event):
+        self.drag_start = None
+
+TILE_SIZE = 250  # Tile size in the tiles view, in pixels
+THUMBNAIL_CACHE_KB = 64 * 1024  # Room for a few hundred tiles in QPixmapCache
+
+
+class ThumbnailSignals(QObject):
+    ready = pyqtSignal(int, int, QImage)  # generation, row, thumbnail
+
+
+class ThumbnailTask(QRunnable):
+    """Renders one tile thumbnail into a QImage on the thread pool."""
+
+    def __init__(self, signals, generation, row, frames, window_level=None):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.row = row
+        self.frames = frames  # Indexed here, so streamed frames are decoded off the GUI thread
+        self.window_level = window_level
+
+    def run(self):
+        thumbnail = make_thumbnail(self.frames[self.row], TILE_SIZE, self.window_level)
+        height, width = thumbnail.shape[:2]
+        if thumbnail.ndim == 3:
+            image = QImage(thumbnail.data, width, height, width * 3, QImage.Format_RGB888)
+        else:
+            image = QImage(thumbnail.data, width, height, width, QImage.Format_Grayscale8)
+        # scaled() hands back the same image when the size already matches, and that
+        # image wraps `thumbnail`, which is freed when run() returns: emit an owned copy
+        image = image.scaled(TILE_SIZE, TILE_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation).copy()
+        self.signals.ready.emit(self.generation, self.row, image)
+
+
+class SliceThumbnailModel(QAbstractListModel):
+    """List model of slice thumbnails for the tiles view.
+
+    Thumbnails are only rendered when the view asks for a tile, i.e. when it
+    scrolls into the viewport, on a worker thread.  Finished thumbnails are
+    kept in the shared QPixmapCache, which bounds their memory.
+    """
+    generations = 0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frames = np.empty((0, 0, 0))
+        self.window_level = None
+        self.generation = 0
+        self.pending = set()
+        self.placeholder = QPixmap(TILE_SIZE, TILE_SIZE)
+        self.placeholder.fill(Qt.black)
+        self.signals = ThumbnailSignals()
+        self.signals.ready.connect(self.on_thumbnail_ready)
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), THUMBNAIL_CACHE_KB))
+
+    def set_frames(self, frames, window_level=None):
+        self.beginResetModel()
+        SliceThumbnailModel.generations += 1  # Tells cached and in-flight thumbnails apart per volume
+        self.generation = SliceThumbnailModel.generations
+        self.frames = frames
+        self.window_level = window_level
+        self.pending.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.frames)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ToolTipRole:
+            return f"Slice {index.row() + 1}"
+        if role != Qt.DecorationRole:
+            return None
+
+        pixmap = QPixmapCache.find(self.cache_key(index.row()))
+        if pixmap is not None:
+            return pixmap
+        if index.row() not in self.pending:
+            self.pending.add(index.row())
+            QThreadPool.globalInstance().start(
+                ThumbnailTask(self.signals, self.generation, index.row(), self.frames, self.window_level))
+        return self.placeholder
+
+    def cache_key(self, row):
+        return f"dicom-tile-{self.generation}-{row}"
+
+    def on_thumbnail_ready(self, generation, row, image):
+        if generation != self.generation:
+            return  # Rendered for a volume that is no longer shown
+        self.pending.discard(row)
+        QPixmapCache.insert(self.cache_key(row), QPixmap.fromImage(image))
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+PREFETCH_FRAMES = 4  # Frames read ahead of cine playback from memory-mapped volumes
+
+
+class FramePrefetchTask(QRunnable):
+    """Touches upcoming frames of a memory-mapped volume so their pages are resident when shown."""
+
+    def __init__(self, frames, indices):
+        super().__init__()
+        self.frames = frames
+        self.indices = indices
+
+    def run(self):
+        for index in self.indices:
+            np.asarray(self.frames[index]).max()
+
+
+class SeriesLoaderThread(QThread):
+    """Reads a folder's headers, then decodes its slices in parallel."""
+    headers_loaded = pyqtSignal(list, list, object)
+    slice_loaded = pyqtSignal(int)
+    volume_loaded = pyqtSignal()  # Every slice is available at once (cache hit)
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_paths, volume_cache=None, header_cache=None, parent=None):
+        super().__init__(parent)
+        self.file_paths = list(file_paths)
+        self.volume_cache = volume_cache
+        self.header_cache = header_cache
+        self.skipped_files = 0
+        self.from_cache = False
+        self.error = None
+
+    def run(self):
+        try:
+            # Cached headers are reused and new ones kept for the metadata windows
+            if self.header_cache is not None:
+                headers = self.header_cache.read_headers(self.file_paths)
+            else:
+                headers = read_headers(self.file_paths)
+            if self.isInterruptionRequested():
+                return
+
+            # Keep the largest series and put its slices in patient order
+            file_paths, headers = largest_series(self.file_paths, headers)
+            require_single_frame(file_paths, headers)
+            self.skipped_files = len(self.file_paths) - len(file_paths)
+
+            # A series opened before is memory-mapped back without decoding anything
+            key = None
+            if self.volume_cache is not None:
+                key = self.volume_cache.key_for(headers[0].get("SeriesInstanceUID", ""), file_paths)
+                cached = self.volume_cache.load(key)
+                if cached is not None:
+                    self.from_cache = True
+                    self.headers_loaded.emit(file_paths, headers, cached[0])
+                    self.volume_loaded.emit()
+                    return
+
+            # Decode straight into one preallocated contiguous volume
+            volume = allocate_volume(headers)
+            self.headers_loaded.emit(file_paths, headers, volume)
+
+            total = len(file_paths)
+            loaded = 0
+            for loaded, (index, pixel_array) in enumerate(
+                    decode_series(file_paths, should_stop=self.isInterruptionRequested), start=1):
+                volume[index] = pixel_array
+                self.slice_loaded.emit(index)
+                self.progress.emit(loaded, total)
+
+            if key is not None and loaded == total:
+                self.volume_cache.store(key, volume, dict(series_geometry(headers), files=file_paths))
+        except Exception as e:
+            self.error = str(e)
+            self.failed.emit(self.error)
+
+class AnonymizeThread(QThread):
+    """Runs a BatchAnonymizer off the GUI thread."""
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, anonymizer, file_paths, parent=None):
+        super().__init__(parent)
+        self.anonymizer = anonymizer
+        self.file_paths = list(file_paths)
+        self.records = []
+        self.error = None
+
+    def run(self):
+        try:
+            self.records = self.anonymizer.run(
+                self.file_paths, progress=self.progress.emit, should_stop=self.isInterruptionRequested)
+        except Exception as e:
+            self.error = str(e)
+
+class ExportThread(QThread):
+    """Writes the open series to a volume file off the GUI thread."""
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, file_paths, output_path, header_cache, frames=None, parent=None):
+        super().__init__(parent)
+        self.file_paths = list(file_paths)
+        self.output_path = output_path
+        self.header_cache = header_cache
+        self.frames = frames  # Decoded slices in file order, if already in memory
+        self.completed = False
+        self.error = None
+
+    def run(self):
+        try:
+            if self.frames is None:
+                self.completed = export_series(self.file_paths, self.output_path, progress=self.progress.emit,
+                                               should_stop=self.isInterruptionRequested)
+            else:
+                headers = self.header_cache.read_headers(self.file_paths)
+                self.completed = write_volume(self.output_path, headers, iter(self.frames), self.progress.emit,
+                                              self.isInterruptionRequested)
+        except Exception as e:
+            self.error = str(e)
+
+
+class IndexScanThread(QThread):
+    """Brings the study index up to date with some folders off the GUI thread."""
+    progress = pyqtSignal(str, int, int)
+
+    def __init__(self, index_path, roots, parent=None):
+        super().__init__(parent)
+        self.index_path = index_path
+        self.roots = list(roots)
+        self.changed = 0
+        self.removed = 0
+        self.error = None
+
+    def run(self):
+        # SQLite connections belong to the thread that opened them
+        study_index = StudyIndex(self.index_path)
+        try:
+            for root in self.roots:
+                if self.isInterruptionRequested():
+                    break
+                changed, removed = study_index.scan(
+                    root, progress=lambda done, total: self.progress.emit(root, done, total),
+                    should_stop=self.isInterruptionRequested)
+                self.changed += changed
+                self.removed += removed
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            study_index.close()
+
+
+class SeriesBrowserWindow(QDialog):
+    """Lists the series of the indexed folders and opens the selected ones.
+
+    The list comes from the local study index, so browsing never walks the
+    file system; "Add Folder" and "Rescan" update the index in the background,
+    re-reading only files that changed.
+    """
+    series_selected = pyqtSignal(list)
+    HEADERS = ["Patient", "Patient ID", "Study Date", "Study", "Series", "Modality", "Description", "Images"]
+
+    def __init__(self, parent=None, index_path=DEFAULT_INDEX_PATH, header_cache=None):
+        super().__init__(parent)
+        self.setWindowTitle("Series Browser")
+        self.setGeometry(150, 150, 900, 500)
+
+        self.study_index = StudyIndex(index_path)
+        self.header_cache = header_cache if header_cache is not None else HeaderCache()
+        self.scan_thread = None
+        self.metadata_window = None
+
+        layout = QVBoxLayout(self)
+        buttons = QHBoxLayout()
+        self.add_button = QPushButton("Add Folder...", self)
+        self.add_button.clicked.connect(self.add_folder)
+        self.rescan_button = QPushButton("Rescan", self)
+        self.rescan_button.clicked.connect(lambda: self.start_scan(self.study_index.roots()))
+        self.open_button = QPushButton("Open", self)
+        self.open_button.clicked.connect(self.open_selected)
+        buttons.addWidget(self.add_button)
+        buttons.addWidget(self.rescan_button)
+        buttons.addStretch()
+        details_button = QPushButton("Details", self)
+        details_button.clicked.connect(lambda: self.show_metadata(DICOMDetailsWindow))
+        attributes_button = QPushButton("Attributes", self)
+        attributes_button.clicked.connect(lambda: self.show_metadata(DICOMAttributesWindow))
+        buttons.addWidget(details_button)
+        buttons.addWidget(attributes_button)
+        buttons.addWidget(self.open_button)
+        layout.addLayout(buttons)
+
+        self.series_tree = QTreeWidget(self)
+        self.series_tree.setHeaderLabels(self.HEADERS)
+        self.series_tree.setRootIsDecorated(False)
+        self.series_tree.setUniformRowHeights(True)
+        self.series_tree.setSortingEnabled(True)
+        # Several series can be opened together, e.g. slices anonymized into one series each
+        self.series_tree.setSelectionMode(QTreeWidget.ExtendedSelection)
+        self.series_tree.itemDoubleClicked.connect(self.open_selected)
+        layout.addWidget(self.series_tree)
+
+        self.status_label = QLabel(self)
+        layout.addWidget(self.status_label)
+
+        self.refresh()
+
+    def refresh(self):
+        self.series_tree.setSortingEnabled(False)
+        self.series_tree.clear()
+        items = []
+        for series in self.study_index.series_list():
+            item = QTreeWidgetItem([
+                series["patient_name"], series["patient_id"], series["study_date"], series["study_description"],
+                "", series["modality"], series["series_description"], "",
+            ])
+            # Numbers are stored as such so those columns sort numerically
+            if series["series_number"] is not None:
+                item.setData(4, Qt.DisplayRole, series["series_number"])
+            item.setData(7, Qt.DisplayRole, series["frames"])
+            item.setData(0, Qt.UserRole, series["series_uid"])
+            items.append(item)
+        self.series_tree.addTopLevelItems(items)
+        self.series_tree.setSortingEnabled(True)
+        self.status_label.setText(f"{len(items)} series in {len(self.study_index.roots())} indexed folders.")
+
+    def add_folder(self):
+        folder_path = QFileDialog.getExistingDirectory(self, "Select Folder to Index")
+        if folder_path:
+            self.start_scan([folder_path])
+
+    def start_scan(self, roots):
+        if self.scan_thread is not None or not roots:
+            return
+        self.add_button.setEnabled(False)
+        self.rescan_button.setEnabled(False)
+        self.scan_thread = IndexScanThread(self.study_index.index_path, roots, self)
+        self.scan_thread.progress.connect(
+            lambda root, done, total: self.status_label.setText(f"Indexing {root}: {done}/{total} changed files..."))
+        self.scan_thread.finished.connect(self.on_scan_finished)
+        self.scan_thread.start()
+        self.status_label.setText("Looking for changed files...")
+
+    def on_scan_finished(self):
+        thread, self.scan_thread = self.scan_thread, None
+        self.add_button.setEnabled(True)
+        self.rescan_button.setEnabled(True)
+        self.refresh()
+        if thread.error is not None:
+            self.status_label.setText(f"Indexing failed: {thread.error}")
+        else:
+            self.status_label.setText(
+                f"{self.status_label.text()} {thread.changed} changed files read, {thread.removed} removed.")
+
+    def show_metadata(self, window_class):
+        """Show the header of the current series' first instance, read without pixel data."""
+        item = self.series_tree.currentItem()
+        if item is None:
+            return
+        file_paths = self.study_index.series_files(item.data(0, Qt.UserRole))
+        try:
+            header = self.header_cache.get(file_paths[0])
+        except (IndexError, OSError) as e:
+            self.status_label.setText(f"Cannot read the series: {e}")
+            return
+        self.metadata_window = window_class(header)
+        self.metadata_window.show()
+
+    def open_selected(self):
+        file_paths = []
+        for item in self.series_tree.selectedItems():
+            file_paths.extend(self.study_index.series_files(item.data(0, Qt.UserRole)))
+        if file_paths:
+            self.series_selected.emit(file_paths)
+
+    def closeEvent(self, event):
+        if self.scan_thread is not None:
+            self.scan_thread.requestInterruption()
+            self.scan_thread.wait()
+        super().closeEvent(event)
+
+
+class AttributeTreeModel(QAbstractItemModel):
+    """Tree model over a dataset's elements, with sequences expandable into their items.
+
+    Rows are AttributeNode objects, which build their children and display
+    strings on first access, so opening the dialog does not depend on the
+    size of the dataset.
+    """
+    HEADERS = ["Tag ID", "VR", "Tag Name", "Value"]
+
+    def __init__(self, dicom_data, parent=None):
+        super().__init__(parent)
+        self.root = AttributeNode.root(dicom_data)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index):
+        node = self.node(index)
+        if node.parent is None or node.parent is self.root:
+            return QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return parent.column() <= 0 and self.node(parent).has_children()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        return self.node(index).columns[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+class AttributeFilterProxyModel(QSortFilterProxyModel):
+    """Keeps the rows whose tag, keyword or value, or any nested element's, contains the search text."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+
+    def set_search_text(self, text):
+        self.search_text = text.lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.search_text:
+            return True
+        node = self.sourceModel().node(source_parent).children[source_row]
+        return self.search_text in node.subtree_text
+
 
 class DICOMAttributesWindow(QDialog):
     def __init__(self, dicom_data, parent=None):
@@ -322,32 +1016,22 @@ class DICOMAttributesWindow(QDialog):
 
         layout = QVBoxLayout(self)
         self.search_bar = QLineEdit(self)
-        self.search_bar.setPlaceholderText("Search by Tag Name...")
+        self.search_bar.setPlaceholderText("Search by Tag ID, Name or Value...")
         self.search_bar.textChanged.connect(self.filter_table)
         layout.addWidget(self.search_bar)
 
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Tag ID", "VR", "Tag Name", "Value"])
-        layout.addWidget(self.table)
-
-        self.populate_table()
+        self.model = AttributeTreeModel(self.dicom_data, self)
+        self.proxy_model = AttributeFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
 
-    def populate_table(self):
-        self.table.setRowCount(0)
-        for elem in self.dicom_data:
-            if elem.VR != 'SQ':  # Skip sequences
-                row_position = self.table.rowCount()
-                self.table.insertRow(row_position)
-                self.table.setItem(row_position, 0, QTableWidgetItem(str(elem.tag)))
-                self.table.setItem(row_position, 1, QTableWidgetItem(elem.VR))
-                self.table.setItem(row_position, 2, QTableWidgetItem(elem.keyword))
-                self.table.setItem(row_position, 3, QTableWidgetItem(str(elem.value)))
+        self.table = QTreeView(self)
+        self.table.setModel(self.proxy_model)
+        self.table.setUniformRowHeights(True)  # Lets the view skip measuring every row
+        self.table.setColumnWidth(0, 160)
+        layout.addWidget(self.table)
 
     def filter_table(self, text):
-        for i in range(self.table.rowCount()):
-            tag_name = self.table.item(i, 2).text().lower()
-            self.table.setRowHidden(i, text.lower() not in tag_name)
+        self.proxy_model.set_search_text(text)
 
 class DICOMDetailsWindow(QDialog):
     def __init__(self, dicom_data, parent=None):
@@ -368,93 +1052,7 @@ class DICOMDetailsWindow(QDialog):
         self.populate_details()
 
     def populate_details(self):
-        def format_date(date_str):
-            if len(date_str) == 8:  # e.g., "YYYYMMDD"
-                return f"{date_str[4:6]}/{date_str[6:8]}/{date_str[:4]}"
-            return date_str
-
-        def format_time(time_str):
-            if len(time_str) >= 6:  # e.g., "HHMMSS"
-                return f"{time_str[:2]}:{time_str[2:4]}:{time_str[4:6]}"
-            return time_str
-
-        details = []
-
-        # Patient Information
-        patient_details = [
-            f"Patient's Name: {self.dicom_data.get('PatientName', 'N/A')}",
-            f"Patient ID: {self.dicom_data.get('PatientID', 'N/A')}",
-            f"Patient's Sex: {self.dicom_data.get('PatientSex', 'N/A')}",
-            f"Patient's Birth Date: {format_date(self.dicom_data.get('PatientBirthDate', 'N/A'))}",
-        ]
-        details.append("Patient\n" + "\n".join(patient_details) + "\n")
-
-        # Station Information
-        station_details = [
-            f"Manufacturer: {self.dicom_data.get('Manufacturer', 'N/A')}",
-            f"Manufacturer's Model Name: {self.dicom_data.get('ManufacturerModelName', 'N/A')}",
-            f"Station Name: {self.dicom_data.get('StationName', 'N/A')}",
-        ]
-        details.append("Station\n" + "\n".join(station_details) + "\n")
-
-        # Study Information
-        study_details = [
-            f"Study Instance UID: {self.dicom_data.get('StudyInstanceUID', 'N/A')}",
-            f"Study Date: {format_date(self.dicom_data.get('StudyDate', 'N/A'))}",
-            f"Study Time: {format_time(self.dicom_data.get('StudyTime', 'N/A'))}",
-            f"Study ID: {self.dicom_data.get('StudyID', 'N/A')}",
-            f"Accession Number: {self.dicom_data.get('AccessionNumber', 'N/A')}",
-            f"Study Description: {self.dicom_data.get('StudyDescription', 'N/A')}",
-        ]
-        details.append("Study\n" + "\n".join(study_details) + "\n")
-
-        # Series Information
-        series_details = [
-            f"Series Instance UID: {self.dicom_data.get('SeriesInstanceUID', 'N/A')}",
-            f"Series Date: {format_date(self.dicom_data.get('SeriesDate', 'N/A'))}",
-            f"Series Time: {format_time(self.dicom_data.get('SeriesTime', 'N/A'))}",
-            f"Series Number: {self.dicom_data.get('SeriesNumber', 'N/A')}",
-            f"Modality: {self.dicom_data.get('Modality', 'N/A')}",
-            f"Referring Physician's Name: {self.dicom_data.get('ReferringPhysicianName', 'N/A')}",
-            f"Institution Name: {self.dicom_data.get('InstitutionName', 'N/A')}",
-            f"Institutional Department Name: {self.dicom_data.get('InstitutionalDepartmentName', 'N/A')}",
-            f"Body Part Examined: {self.dicom_data.get('BodyPartExamined', 'N/A')}",
-        ]
-        details.append("Series\n" + "\n".join(series_details) + "\n")
-
-        # DICOM Object Information
-        dicom_object_details = [
-            f"SOP Instance UID: {self.dicom_data.get('SOPInstanceUID', 'N/A')}",
-            f"Image Type: {self.dicom_data.get('ImageType', 'N/A')}",
-            f"SOP Class UID: {self.dicom_data.get('SOPClassUID', 'N/A')}",
-            f"Transfer Syntax UID: {self.dicom_data.get('TransferSyntaxUID', 'N/A')}",
-            f"Instance Number: {self.dicom_data.get('InstanceNumber', 'N/A')}",
-            f"Image Comments: {self.dicom_data.get('ImageComments', 'N/A')}",
-            f"Photometric Interpretation: {self.dicom_data.get('PhotometricInterpretation', 'N/A')}",
-            f"Samples per Pixel: {self.dicom_data.get('SamplesPerPixel', 'N/A')}",
-            f"Pixel Representation: {self.dicom_data.get('PixelRepresentation', 'N/A')}",
-            f"Columns: {self.dicom_data.get('Columns', 'N/A')}",
-            f"Rows: {self.dicom_data.get('Rows', 'N/A')}",
-            f"Bits Allocated: {self.dicom_data.get('BitsAllocated', 'N/A')}",
-            f"Bits Stored: {self.dicom_data.get('BitsStored', 'N/A')}",
-        ]
-        details.append("DICOM Object\n" + "\n".join(dicom_object_details))
-
-        # Image Plane Information
-        pixel_spacing = self.dicom_data.get('PixelSpacing', ['N/A', 'N/A'])
-        image_plane_details = [
-            f"Pixel Spacing: {', '.join(map(str, pixel_spacing))}"
-        ]
-        details.append("Image Plane\n" + "\n".join(image_plane_details) + "\n")
-
-        # Image Acquisition Information
-        image_acquisition_details = [
-            f"KVP: {self.dicom_data.get('KVP', 'N/A')}",
-        ]
-        details.append("Image Acquisition\n" + "\n".join(image_acquisition_details))
-
-        # Set all details to the QLabel
-        self.details_label.setText("\n\n".join(details))
+        self.details_label.setText(format_details(self.dicom_data))
 
 def main():
     app = QApplication(sys.argv)
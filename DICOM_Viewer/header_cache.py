@@ -0,0 +1,46 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from series_loader import DEFAULT_WORKERS, read_header
+
+DEFAULT_MAX_ENTRIES = 1024  # Headers of a typical series fit
+
+
+class HeaderCache:
+    """Memoized header-only datasets, keyed by file path, size and mtime.
+
+    Headers are read with `stop_before_pixels`, so looking at the metadata of
+    any file never touches its pixel bytes, and a file is parsed again only
+    after it changes on disk.  The least recently used headers are dropped
+    past `max_entries`.  Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # path -> (size, mtime_ns, dataset)
+        self.lock = threading.Lock()
+
+    def get(self, file_path):
+        """The header of a file, read only if it is not cached or the file changed."""
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.entries.get(file_path)
+            if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                self.entries.move_to_end(file_path)
+                return entry[2]
+
+        header = read_header(file_path)
+        with self.lock:
+            self.entries[file_path] = (stat.st_size, stat.st_mtime_ns, header)
+            self.entries.move_to_end(file_path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return header
+
+    def read_headers(self, file_paths, max_workers=DEFAULT_WORKERS):
+        """Headers of all files, read in parallel where missing, keeping the input order."""
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(self.get, file_paths))
@@ -0,0 +1,65 @@
+import time
+from collections import deque
+
+DEFAULT_FRAME_INTERVAL = 0.1  # Seconds per frame (10 FPS) when the header gives no rate
+
+
+def frame_interval_from_header(dicom_data, default=DEFAULT_FRAME_INTERVAL):
+    """Seconds per frame from FrameTime, CineRate or RecommendedDisplayFrameRate."""
+    frame_time = dicom_data.get("FrameTime")  # Milliseconds
+    if frame_time:
+        return float(frame_time) / 1000.0
+    for keyword in ("CineRate", "RecommendedDisplayFrameRate"):  # Frames per second
+        rate = dicom_data.get(keyword)
+        if rate:
+            return 1.0 / float(rate)
+    return default
+
+
+class PlaybackClock:
+    """Decides which frame is due from a monotonic clock, independent of render time.
+
+    Each call to `advance` returns the frame that should be on screen now, or
+    None if it is still the one shown last.  When rendering falls behind, the
+    frames in between are skipped and counted as dropped, so playback keeps the
+    real frame rate instead of slowing down.
+    """
+
+    def __init__(self, frame_count, frame_interval, clock=time.monotonic):
+        self.frame_count = frame_count
+        self.frame_interval = frame_interval
+        self.clock = clock
+        self.start()
+
+    def start(self, frame=0):
+        self.start_time = self.clock() - frame * self.frame_interval
+        self.position = frame  # Frames elapsed since playback began, not wrapped
+        self.dropped = 0
+        self.shown_times = deque()
+
+    def advance(self):
+        now = self.clock()
+        position = int((now - self.start_time) / self.frame_interval)
+        if position <= self.position:
+            return None
+        self.dropped += position - self.position - 1
+        self.position = position
+        self.shown_times.append(now)
+        while now - self.shown_times[0] > 1.0:
+            self.shown_times.popleft()
+        return position % self.frame_count
+
+    def next_frames(self, count):
+        """The frames due after the current one, for prefetching."""
+        return [(self.position + offset) % self.frame_count for offset in range(1, count + 1)]
+
+    @property
+    def target_fps(self):
+        return 1.0 / self.frame_interval
+
+    @property
+    def achieved_fps(self):
+        """Frame rate over the frames shown during the last second."""
+        if len(self.shown_times) < 2:
+            return 0.0
+        return (len(self.shown_times) - 1) / (self.shown_times[-1] - self.shown_times[0])
@@ -0,0 +1,226 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pydicom
+
+# pydicom spends most of its time in file I/O and in the pixel decoders,
+# so a thread pool is enough to keep several files in flight at once.
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+
+def list_dicom_files(folder_path, recursive=False):
+    """List the .dcm files in a folder, optionally including its subfolders."""
+    if not recursive:
+        return [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith('.dcm')]
+    return [os.path.join(root, f) for root, _, names in os.walk(folder_path)
+            for f in names if f.endswith('.dcm')]
+
+
+def read_header(file_path):
+    """Read a DICOM file's header, stopping before the pixel data."""
+    return pydicom.dcmread(file_path, stop_before_pixels=True)
+
+
+def read_headers(file_paths, max_workers=DEFAULT_WORKERS):
+    """Read the headers of all files in parallel, keeping the input order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(read_header, file_paths))
+
+
+def slice_normal(header):
+    """Return the unit normal of a slice from its ImageOrientationPatient, or None."""
+    orientation = header.get("ImageOrientationPatient")
+    if orientation is None or len(orientation) != 6:
+        return None
+    row, col = np.asarray(orientation[:3], dtype=float), np.asarray(orientation[3:], dtype=float)
+    normal = np.cross(row, col)
+    length = np.linalg.norm(normal)
+    return normal / length if length else None
+
+
+def frame_count(header):
+    return int(header.get("NumberOfFrames", 1) or 1)
+
+
+def pixel_geometry(header):
+    """Rows, columns and samples per pixel: images can only be stacked when these match."""
+    return header.get("Rows"), header.get("Columns"), int(header.get("SamplesPerPixel", 1))
+
+
+def group_series(file_paths, headers):
+    """Group files by SeriesInstanceUID, largest series first.
+
+    Multi-frame files hold a whole volume each, so they are never stacked
+    with other files: each one is its own group, after the single-frame
+    series.  Folders whose anonymizer gave every file its own series UID
+    would end up as one "series" per file; those are kept together as a
+    single group when all the images have the same size.
+    """
+    groups = {}
+    multi_frame = []
+    for path, header in zip(file_paths, headers):
+        if frame_count(header) > 1:
+            multi_frame.append([(path, header)])
+        else:
+            groups.setdefault(str(header.get("SeriesInstanceUID", "")), []).append((path, header))
+    single_frame = [item for group in groups.values() for item in group]
+    multi_frame.sort(key=lambda group: frame_count(group[0][1]), reverse=True)
+    if (len(groups) > 1 and len(groups) == len(single_frame)
+            and len({pixel_geometry(header) for _, header in single_frame}) == 1):
+        return [single_frame] + multi_frame
+    return sorted(groups.values(), key=len, reverse=True) + multi_frame
+
+
+def sort_slices(file_paths, headers):
+    """Sort slices along the slice normal by ImagePositionPatient.
+
+    Slices without position information fall back to InstanceNumber, then to
+    the file name.  Returns the sorted (file_paths, headers).
+    """
+    normal = slice_normal(headers[0]) if headers else None
+
+    def sort_key(item):
+        path, header = item
+        position = header.get("ImagePositionPatient")
+        if normal is not None and position is not None and len(position) == 3:
+            distance = float(np.dot(normal, np.asarray(position, dtype=float)))
+        else:
+            distance = 0.0
+        instance = header.get("InstanceNumber")
+        return distance, int(instance) if instance is not None else 0, os.path.basename(path)
+
+    items = sorted(zip(file_paths, headers), key=sort_key)
+    return [path for path, _ in items], [header for _, header in items]
+
+
+def largest_series(file_paths, headers):
+    """Return the sorted (file_paths, headers) of the largest series among the files.
+
+    A multi-frame file is only returned when the files hold no single-frame series.
+    """
+    series = group_series(file_paths, headers)[0]
+    return sort_slices([path for path, _ in series], [header for _, header in series])
+
+
+def series_geometry(headers):
+    """Describe the geometry of a sorted series as plain JSON-friendly values."""
+    header = headers[0]
+    row_spacing, col_spacing = (float(v) for v in header.get("PixelSpacing", [1.0, 1.0]))
+    positions = [[float(v) for v in h.ImagePositionPatient] if h.get("ImagePositionPatient") else None
+                 for h in headers]
+    slice_spacing = float(header.get("SpacingBetweenSlices", header.get("SliceThickness", 1.0)) or 1.0)
+    normal = slice_normal(header)
+    if normal is not None and len(headers) > 1 and positions[0] and positions[-1]:
+        distance = float(np.dot(normal, np.subtract(positions[-1], positions[0])))
+        if distance:
+            slice_spacing = abs(distance) / (len(headers) - 1)
+    orientation = header.get("ImageOrientationPatient", [1, 0, 0, 0, 1, 0])
+    return {
+        "series_uid": str(header.get("SeriesInstanceUID", "")),
+        "spacing": [slice_spacing, row_spacing, col_spacing],  # (slice, row, column) in mm
+        "orientation": [float(v) for v in orientation],
+        "positions": positions,
+    }
+
+
+def pixel_dtype(header):
+    """Return the NumPy dtype pydicom decodes this header's pixel data to."""
+    bits = header.get("BitsAllocated", 16)
+    if bits == 1:
+        return np.dtype(np.uint8)
+    signed = header.get("PixelRepresentation", 0) == 1
+    return np.dtype(f"{'i' if signed else 'u'}{max(bits, 8) // 8}")
+
+
+def require_single_frame(file_paths, headers):
+    """Raise a ValueError when a series is a multi-frame file, which cannot be decoded slice by slice."""
+    if headers and frame_count(headers[0]) > 1:
+        raise ValueError(f"{os.path.basename(file_paths[0])} is a multi-frame file with "
+                         f"{frame_count(headers[0])} frames; open it on its own")
+
+
+def allocate_volume(headers):
+    """Preallocate one contiguous (N, rows, cols[, samples]) array for a series.
+
+    N is the number of files, or the number of frames of a single multi-frame file.
+    """
+    header = headers[0]
+    frames = frame_count(header)
+    if frames > 1 and len(headers) > 1:
+        raise ValueError("multi-frame files cannot be stacked with other files")
+    shape = (max(frames, len(headers)), int(header.Rows), int(header.Columns))
+    samples = int(header.get("SamplesPerPixel", 1))
+    if samples > 1:
+        shape += (samples,)
+    return np.empty(shape, dtype=pixel_dtype(header))
+
+
+def decode_pixels(file_path):
+    """Read a DICOM file and decode its pixel data."""
+    return pydicom.dcmread(file_path).pixel_array
+
+
+def decode_series(file_paths, max_workers=DEFAULT_WORKERS, should_stop=None):
+    """Decode the pixel data of every file, yielding (index, pixel_array).
+
+    The first file is decoded before anything else so the caller can show it
+    straight away; the remaining files are yielded as soon as they finish.
+    `should_stop` is polled between files and cancels the remaining work
+    when it returns True.
+    """
+    if not file_paths:
+        return
+
+    yield 0, decode_pixels(file_paths[0])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(decode_pixels, path): index
+                   for index, path in enumerate(file_paths[1:], start=1)}
+        try:
+            for future in as_completed(futures):
+                if should_stop is not None and should_stop():
+                    break
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def decode_in_order(file_paths, max_workers=DEFAULT_WORKERS):
+    """Decode the pixel data of every file, yielding the arrays in file order.
+
+    At most twice `max_workers` files are decoded ahead of the consumer, so
+    a series can be streamed to disk without ever being fully in memory.
+    """
+    paths = iter(file_paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque(pool.submit(decode_pixels, path) for _, path in zip(range(2 * max_workers), paths))
+        try:
+            while pending:
+                pixel_array = pending.popleft().result()
+                for path in paths:
+                    pending.append(pool.submit(decode_pixels, path))
+                    break
+                yield pixel_array
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def load_series(file_paths, max_workers=DEFAULT_WORKERS):
+    """Read, sort and decode the largest series among the files in one call.
+
+    Returns (sorted file_paths, headers, volume) with the slices stacked in a
+    contiguous (N, rows, cols) array.  When the files hold nothing but
+    multi-frame files, the volume holds the frames of the largest one.
+    """
+    file_paths, headers = largest_series(file_paths, read_headers(file_paths, max_workers))
+    volume = allocate_volume(headers)
+    if frame_count(headers[0]) > 1:
+        volume[:] = decode_pixels(file_paths[0])  # All the frames come from the one file
+        return file_paths, headers, volume
+    for index, pixel_array in decode_series(file_paths, max_workers):
+        volume[index] = pixel_array
+    return file_paths, headers, volume
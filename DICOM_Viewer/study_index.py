@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pydicom
+
+from series_loader import DEFAULT_WORKERS
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "DICOM_VIEWER_INDEX", os.path.join(os.path.expanduser("~"), ".cache", "dicom_viewer", "index.sqlite"))
+SCAN_BATCH = 256  # Headers read (and committed) per batch while scanning
+
+# Only these elements are parsed, which keeps indexing large archives cheap
+INDEX_TAGS = [
+    "PatientID", "PatientName", "PatientBirthDate", "PatientSex",
+    "StudyInstanceUID", "StudyDate", "StudyTime", "StudyDescription", "AccessionNumber",
+    "SeriesInstanceUID", "SeriesNumber", "SeriesDescription", "Modality", "BodyPartExamined",
+    "SOPInstanceUID", "InstanceNumber", "NumberOfFrames",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    scanned_at REAL
+);
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    patient_name TEXT NOT NULL,
+    birth_date TEXT,
+    sex TEXT,
+    UNIQUE (patient_id, patient_name)
+);
+CREATE TABLE IF NOT EXISTS studies (
+    study_uid TEXT PRIMARY KEY,
+    patient INTEGER REFERENCES patients (id),
+    study_date TEXT,
+    study_time TEXT,
+    description TEXT,
+    accession_number TEXT
+);
+CREATE TABLE IF NOT EXISTS series (
+    series_uid TEXT PRIMARY KEY,
+    study_uid TEXT REFERENCES studies (study_uid),
+    series_number INTEGER,
+    modality TEXT,
+    description TEXT,
+    body_part TEXT
+);
+CREATE TABLE IF NOT EXISTS instances (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    series_uid TEXT REFERENCES series (series_uid),
+    sop_instance_uid TEXT,
+    instance_number INTEGER,
+    frames INTEGER
+);
+CREATE INDEX IF NOT EXISTS instances_by_series ON instances (series_uid);
+-- Files that are not DICOM instances, remembered so they are not read again
+CREATE TABLE IF NOT EXISTS other_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+def text(value):
+    return "" if value is None else str(value)
+
+
+def integer(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_index_record(file_path):
+    """Read the indexed elements of a file, or None if it is not a DICOM instance."""
+    try:
+        header = pydicom.dcmread(file_path, stop_before_pixels=True, specific_tags=INDEX_TAGS)
+    except Exception:
+        return None
+    if not header.get("SeriesInstanceUID") or not header.get("SOPInstanceUID"):
+        return None  # e.g. DICOMDIR files
+    return {
+        "patient_id": text(header.get("PatientID")),
+        "patient_name": text(header.get("PatientName")),
+        "birth_date": text(header.get("PatientBirthDate")),
+        "sex": text(header.get("PatientSex")),
+        "study_uid": text(header.get("StudyInstanceUID")),
+        "study_date": text(header.get("StudyDate")),
+        "study_time": text(header.get("StudyTime")),
+        "study_description": text(header.get("StudyDescription")),
+        "accession_number": text(header.get("AccessionNumber")),
+        "series_uid": text(header.get("SeriesInstanceUID")),
+        "series_number": integer(header.get("SeriesNumber")),
+        "modality": text(header.get("Modality")),
+        "series_description": text(header.get("SeriesDescription")),
+        "body_part": text(header.get("BodyPartExamined")),
+        "sop_instance_uid": text(header.get("SOPInstanceUID")),
+        "instance_number": integer(header.get("InstanceNumber")),
+        "frames": integer(header.get("NumberOfFrames")) or 1,
+    }
+
+
+def walk_files(root):
+    """Yield (path, size, mtime_ns) for every file below root."""
+    stack = [root]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+
+
+class StudyIndex:
+    """Local SQLite index of the patients, studies, series and instances under scanned folders.
+
+    `scan` walks a folder tree and only reads the headers of files that are
+    new or whose size or mtime changed since the last scan, several at a
+    time; files that disappeared are dropped.  The viewer browses series
+    from the index instead of walking the file system again.  Use one
+    StudyIndex per thread; readers are not blocked by a running scan.
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        self.connection = sqlite3.connect(index_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def roots(self):
+        return [row[0] for row in self.connection.execute("SELECT path FROM roots ORDER BY path")]
+
+    def known_files(self, root):
+        """Size and mtime of the indexed files below root, by path."""
+        low, high = root + os.sep, root + os.sep + "\U0010ffff"
+        known = {}
+        for table in ("instances", "other_files"):
+            for path, size, mtime_ns in self.connection.execute(
+                    f"SELECT path, size, mtime_ns FROM {table} WHERE path >= ? AND path < ?", (low, high)):
+                known[path] = (size, mtime_ns)
+        return known
+
+    def scan(self, root, max_workers=DEFAULT_WORKERS, progress=None, should_stop=None):
+        """Bring the index up to date with the files below root.
+
+        `progress(done, total)` is called after each batch of changed files and
+        `should_stop()` is polled between batches; whatever was indexed before
+        stopping is kept.  Returns (changed files, removed files).
+        """
+        root = os.path.abspath(root)
+        known = self.known_files(root)
+        changed = []
+        for path, size, mtime_ns in walk_files(root):
+            if known.pop(path, None) != (size, mtime_ns):
+                changed.append((path, size, mtime_ns))
+        removed = list(known)  # Indexed before, gone now
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+            self.remove_files(removed)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for start in range(0, len(changed), SCAN_BATCH):
+                if should_stop is not None and should_stop():
+                    break
+                batch = changed[start:start + SCAN_BATCH]
+                records = pool.map(read_index_record, [path for path, _, _ in batch])
+                with self.connection:
+                    for (path, size, mtime_ns), record in zip(batch, records):
+                        self.store_file(path, size, mtime_ns, record)
+                if progress is not None:
+                    progress(start + len(batch), len(changed))
+
+        with self.connection:
+            self.remove_orphans()
+        return len(changed), len(removed)
+
+    def remove_files(self, paths):
+        self.connection.executemany("DELETE FROM instances WHERE path = ?", [(path,) for path in paths])
+        self.connection.executemany("DELETE FROM other_files WHERE path = ?", [(path,) for path in paths])
+
+    def store_file(self, path, size, mtime_ns, record):
+        self.remove_files([path])
+        if record is None:
+            self.connection.execute("INSERT INTO other_files VALUES (?, ?, ?)", (path, size, mtime_ns))
+            return
+        self.connection.execute(
+            "INSERT OR IGNORE INTO patients (patient_id, patient_name, birth_date, sex) VALUES (?, ?, ?, ?)",
+            (record["patient_id"], record["patient_name"], record["birth_date"], record["sex"]))
+        patient = self.connection.execute(
+            "SELECT id FROM patients WHERE patient_id = ? AND patient_name = ?",
+            (record["patient_id"], record["patient_name"])).fetchone()[0]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO studies VALUES (?, ?, ?, ?, ?, ?)",
+            (record["study_uid"], patient, record["study_date"], record["study_time"],
+             record["study_description"], record["accession_number"]))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+            (record["series_uid"], record["study_uid"], record["series_number"], record["modality"],
+             record["series_description"], record["body_part"]))
+        self.connection.execute(
+            "INSERT INTO instances VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, record["series_uid"], record["sop_instance_uid"],
+             record["instance_number"], record["frames"]))
+
+    def remove_orphans(self):
+        """Drop series, studies and patients that no longer have any instance."""
+        self.connection.execute(
+            "DELETE FROM series WHERE series_uid NOT IN (SELECT DISTINCT series_uid FROM instances)")
+        self.connection.execute(
+            "DELETE FROM studies WHERE study_uid NOT IN (SELECT DISTINCT study_uid FROM series)")
+        self.connection.execute(
+            "DELETE FROM patients WHERE id NOT IN (SELECT DISTINCT patient FROM studies)")
+
+    def series_list(self):
+        """One dict per indexed series with its patient and study, in browsing order."""
+        cursor = self.connection.execute("""
+            SELECT patients.patient_name, patients.patient_id, studies.study_uid, studies.study_date,
+                   studies.description, series.series_uid, series.series_number, series.modality,
+                   series.description, COUNT(instances.path), SUM(instances.frames)
+            FROM series
+            JOIN studies ON studies.study_uid = series.study_uid
+            JOIN patients ON patients.id = studies.patient
+            JOIN instances ON instances.series_uid = series.series_uid
+            GROUP BY series.series_uid
+            ORDER BY patients.patient_name, patients.patient_id, studies.study_date, studies.study_uid,
+                     series.series_number, series.series_uid
+        """)
+        columns = ["patient_name", "patient_id", "study_uid", "study_date", "study_description",
+                   "series_uid", "series_number", "modality", "series_description", "instances", "frames"]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def series_files(self, series_uid):
+        """Paths of a series' instances, in InstanceNumber order."""
+        return [row[0] for row in self.connection.execute(
+            "SELECT path FROM instances WHERE series_uid = ? ORDER BY instance_number, path", (series_uid,))]
@@ -0,0 +1,39 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anonymizer import HASH_LENGTH, UIDMapper  # noqa: E402
+
+KEY = bytes(range(32))
+
+
+def test_same_key_and_input_map_to_the_same_value_across_mappers():
+    first, second = UIDMapper(KEY), UIDMapper(KEY)
+    for tag, value in [("PatientID", "12345"), ("PatientName", "Doe^John"), ("StudyInstanceUID", "1.2.840.1")]:
+        assert first.map_value(tag, value, "ANON") == second.map_value(tag, value, "ANON")
+    assert UIDMapper(bytes(32)).map_value("PatientID", "12345", "ANON") != first.map_value("PatientID", "12345", "ANON")
+
+
+def test_key_file_round_trip(tmp_path):
+    key_path = str(tmp_path / "keys" / "anonymization.key")
+    created = UIDMapper.load(key_path)
+    assert UIDMapper.load(key_path).key == created.key
+    assert oct(os.stat(key_path).st_mode & 0o777) == "0o600"
+
+
+def test_generated_uids_are_valid():
+    mapper = UIDMapper(KEY)
+    for index in range(1000):
+        uid = mapper.map_value("SeriesInstanceUID", f"1.2.840.113619.{index}")
+        assert len(uid) <= 64
+        assert re.fullmatch(r"2\.25\.(0|[1-9][0-9]*)", uid)
+
+
+def test_patient_pseudonyms_keep_enough_bits_to_stay_distinct():
+    mapper = UIDMapper(KEY)
+    pseudonyms = {mapper.map_value("PatientID", f"P{index:06d}", "ANON") for index in range(20000)}
+    assert len(pseudonyms) == 20000
+    assert all(len(value) == len("ANON") + HASH_LENGTH for value in pseudonyms)
+    assert HASH_LENGTH >= 16
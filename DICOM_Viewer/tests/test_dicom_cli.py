@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dicom_cli import main  # noqa: E402
+from test_series_loader import MULTI_FRAME_FILE  # noqa: E402
+
+
+def test_anonymize_single_file(tmp_path, capsys):
+    key_path = str(tmp_path / "anonymization.key")
+    output = tmp_path / "out"
+    assert main(["--processes", "1", "anonymize", MULTI_FRAME_FILE, "--prefix", "ANON",
+                 "--key", key_path, "--output", str(output)]) == 0
+    assert "anonymized 1 files (0 failed)" in capsys.readouterr().out
+    with open(output / "M2D" / "anonymization_audit.json") as f:
+        audit = json.load(f)
+    assert audit["anonymized"] == 1
+    assert os.path.exists(audit["files"][0]["output"])
+    assert (output / "M2D" / "M2D.dcm").exists()
+
+
+def test_missing_study_is_a_usage_error(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["anonymize", str(tmp_path / "missing.dcm"), "--prefix", "ANON", "--output", str(tmp_path)])
+    assert exit_info.value.code == 2
+    assert "no such study folder or file" in capsys.readouterr().err
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from pydicom.dataset import FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, ImplicitVRLittleEndian, RLELossless
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frame_stream  # noqa: E402
+from frame_stream import FrameReader, StreamedFrames  # noqa: E402
+from test_series_loader import MULTI_FRAME_FILE, header  # noqa: E402
+
+
+def write_multi_frame(path, frames, transfer_syntax):
+    dataset = header("1.2.3", rows=frames.shape[1], columns=frames.shape[2], frames=len(frames))
+    dataset.file_meta = FileMetaDataset()
+    dataset.file_meta.TransferSyntaxUID = transfer_syntax
+    dataset.file_meta.MediaStorageSOPClassUID = dataset.SOPClassUID = "1.2.840.10008.5.1.4.1.1.7.3"
+    dataset.file_meta.MediaStorageSOPInstanceUID = dataset.SOPInstanceUID = "1.2.3.4"
+    dataset.PhotometricInterpretation = "MONOCHROME2"
+    dataset.BitsAllocated = dataset.BitsStored = 16
+    dataset.HighBit = 15
+    dataset.PixelRepresentation = 0
+    if transfer_syntax == RLELossless:
+        dataset.compress(RLELossless, frames)
+    else:
+        dataset.PixelData = frames.tobytes()
+    dataset.save_as(path, enforce_file_format=True)
+    return dataset
+
+
+@pytest.mark.parametrize("transfer_syntax", [ExplicitVRLittleEndian, ImplicitVRLittleEndian, RLELossless])
+def test_frame_reader_decodes_every_frame(tmp_path, transfer_syntax):
+    frames = np.arange(5 * 6 * 7, dtype=np.uint16).reshape(5, 6, 7)
+    write_multi_frame(tmp_path / "cine.dcm", frames, transfer_syntax)
+    reader = FrameReader(str(tmp_path / "cine.dcm"))
+    assert len(reader) == 5
+    for index in (0, 3, 4, -1):
+        np.testing.assert_array_equal(reader[index], frames[index])
+
+
+def test_frame_reader_parses_the_header_once(tmp_path, monkeypatch):
+    frames = np.arange(4 * 3 * 3, dtype=np.uint16).reshape(4, 3, 3)
+    dataset = write_multi_frame(tmp_path / "cine.dcm", frames, ExplicitVRLittleEndian)
+    calls = []
+    dcmread = frame_stream.pydicom.dcmread
+    monkeypatch.setattr(frame_stream.pydicom, "dcmread", lambda *args, **kwargs: calls.append(1) or dcmread(*args, **kwargs))
+
+    streamed = StreamedFrames(str(tmp_path / "cine.dcm"), dataset, read_ahead=2)
+    try:
+        for index in (0, 1, 2, 3, 0, 2):
+            np.testing.assert_array_equal(streamed[index], frames[index])
+        for index in range(4):
+            np.testing.assert_array_equal(streamed.reader[index], frames[index])
+    finally:
+        streamed.close()
+    assert len(calls) == 1
+
+
+def test_reader_access_does_not_move_the_read_ahead(tmp_path):
+    frames = np.zeros((8, 2, 2), dtype=np.uint16)
+    dataset = write_multi_frame(tmp_path / "cine.dcm", frames, ExplicitVRLittleEndian)
+    streamed = StreamedFrames(str(tmp_path / "cine.dcm"), dataset, read_ahead=2)
+    try:
+        streamed[5]
+        streamed.reader[1]
+        assert streamed.cursor == 5
+    finally:
+        streamed.close()
+
+
+def test_frame_reader_matches_full_decode_of_example():
+    import pydicom
+    expected = pydicom.dcmread(MULTI_FRAME_FILE).pixel_array
+    reader = FrameReader(MULTI_FRAME_FILE)
+    np.testing.assert_array_equal(reader[len(reader) - 1], expected[-1])
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+from pydicom.dataset import Dataset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playback import PlaybackClock, frame_interval_from_header  # noqa: E402
+
+
+class FakeClock:
+    """A monotonic clock the test moves by hand."""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_frames_follow_the_clock_and_count_drops_after_a_stall():
+    clock = FakeClock()
+    playback = PlaybackClock(frame_count=10, frame_interval=0.25, clock=clock)
+    assert playback.advance() is None  # Frame 0 is still due
+
+    clock.now += 0.25
+    assert playback.advance() == 1
+    clock.now += 0.1
+    assert playback.advance() is None  # Rendering is ahead of the frame rate
+    clock.now += 0.15
+    assert playback.advance() == 2
+    assert playback.dropped == 0
+
+    clock.now += 1.0  # A one-second stall: frames 3, 4 and 5 are never shown
+    assert playback.advance() == 6
+    assert playback.dropped == 3
+    assert playback.next_frames(2) == [7, 8]
+
+
+def test_position_wraps_around_and_restart_resets_drops():
+    clock = FakeClock()
+    playback = PlaybackClock(frame_count=4, frame_interval=0.25, clock=clock)
+    clock.now += 0.25 * 9
+    assert playback.advance() == 1  # Ninth frame of a four-frame loop
+    assert playback.dropped == 8
+
+    playback.start(frame=2)
+    assert playback.dropped == 0
+    clock.now += 0.25
+    assert playback.advance() == 3
+
+
+def test_achieved_fps_covers_the_last_second():
+    clock = FakeClock()
+    playback = PlaybackClock(frame_count=100, frame_interval=0.125, clock=clock)
+    for _ in range(16):
+        clock.now += 0.125
+        playback.advance()
+    assert playback.achieved_fps == pytest.approx(8.0)
+    assert playback.target_fps == 8.0
+
+
+def test_frame_interval_from_header():
+    dataset = Dataset()
+    assert frame_interval_from_header(dataset) == 0.1
+    dataset.RecommendedDisplayFrameRate = 25
+    assert frame_interval_from_header(dataset) == pytest.approx(0.04)
+    dataset.FrameTime = 33.3
+    assert frame_interval_from_header(dataset) == pytest.approx(0.0333)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import sys
+
+import pytest
+from pydicom.dataset import Dataset
+
+VIEWER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, VIEWER_DIR)
+
+from series_loader import (  # noqa: E402
+    group_series, largest_series, list_dicom_files, load_series, read_headers, require_single_frame
+)
+
+DATA_DIR = os.path.join(VIEWER_DIR, "data_example")
+MULTI_FRAME_FILE = os.path.join(DATA_DIR, "M2D.dcm")
+SERIES_DIR = os.path.join(DATA_DIR, "3D")
+
+
+def header(series_uid, rows=4, columns=4, samples=1, frames=None):
+    dataset = Dataset()
+    dataset.SeriesInstanceUID = series_uid
+    dataset.Rows = rows
+    dataset.Columns = columns
+    dataset.SamplesPerPixel = samples
+    if frames is not None:
+        dataset.NumberOfFrames = frames
+    return dataset
+
+
+def test_per_file_uids_with_matching_geometry_are_merged():
+    headers = [header(f"1.2.{index}") for index in range(3)]
+    groups = group_series(["a", "b", "c"], headers)
+    assert len(groups) == 1
+    assert [path for path, _ in groups[0]] == ["a", "b", "c"]
+
+
+def test_per_file_uids_with_different_geometry_are_not_merged():
+    headers = [header("1.2.1"), header("1.2.2", rows=8), header("1.2.3", samples=3)]
+    groups = group_series(["a", "b", "c"], headers)
+    assert len(groups) == 3
+    assert all(len(group) == 1 for group in groups)
+
+
+def test_multi_frame_files_are_never_stacked():
+    headers = [header("1.2.1"), header("1.2.1"), header("1.2.1", frames=7)]
+    groups = group_series(["a", "b", "m"], headers)
+    assert [[path for path, _ in group] for group in groups] == [["a", "b"], ["m"]]
+
+
+@pytest.fixture
+def mixed_folder(tmp_path):
+    """The example series plus a multi-frame file of another size in one folder."""
+    for name in os.listdir(SERIES_DIR):
+        shutil.copy(os.path.join(SERIES_DIR, name), tmp_path / name)
+    shutil.copy(MULTI_FRAME_FILE, tmp_path / "M2D.dcm")
+    return tmp_path
+
+
+def test_load_series_skips_multi_frame_file_in_folder(mixed_folder):
+    file_paths, headers, volume = load_series(list_dicom_files(str(mixed_folder)))
+    assert len(file_paths) == len(os.listdir(SERIES_DIR))
+    assert "M2D.dcm" not in {os.path.basename(path) for path in file_paths}
+    assert volume.shape == (len(file_paths), 512, 512)
+
+
+def test_load_series_of_multi_frame_file_holds_its_frames(tmp_path):
+    shutil.copy(MULTI_FRAME_FILE, tmp_path / "M2D.dcm")
+    file_paths, headers, volume = load_series(list_dicom_files(str(tmp_path)))
+    assert volume.shape == (7, 434, 636, 3)
+
+
+def test_require_single_frame_rejects_multi_frame_file(tmp_path):
+    shutil.copy(MULTI_FRAME_FILE, tmp_path / "M2D.dcm")
+    file_paths = list_dicom_files(str(tmp_path))
+    file_paths, headers = largest_series(file_paths, read_headers(file_paths))
+    with pytest.raises(ValueError, match="multi-frame"):
+        require_single_frame(file_paths, headers)
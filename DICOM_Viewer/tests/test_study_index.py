@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import study_index  # noqa: E402
+from study_index import StudyIndex  # noqa: E402
+
+
+def write_instance(path, series_uid, instance_number):
+    dataset = Dataset()
+    dataset.file_meta = FileMetaDataset()
+    dataset.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    dataset.file_meta.MediaStorageSOPClassUID = dataset.SOPClassUID = "1.2.840.10008.5.1.4.1.1.2"
+    dataset.file_meta.MediaStorageSOPInstanceUID = dataset.SOPInstanceUID = f"{series_uid}.{instance_number}"
+    dataset.PatientID = "P1"
+    dataset.PatientName = "Doe^Jane"
+    dataset.StudyInstanceUID = "1.2.3"
+    dataset.SeriesInstanceUID = series_uid
+    dataset.SeriesNumber = int(series_uid.rsplit(".", 1)[1])
+    dataset.Modality = "CT"
+    dataset.InstanceNumber = instance_number
+    dataset.save_as(path, enforce_file_format=True)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Two series of three instances in nested folders, plus a file that is not DICOM."""
+    root = tmp_path / "archive"
+    for series in (1, 2):
+        folder = root / "study" / f"series{series}"
+        folder.mkdir(parents=True)
+        for instance in range(1, 4):
+            write_instance(str(folder / f"{instance}.dcm"), f"1.2.3.{series}", instance)
+    (root / "notes.txt").write_text("not DICOM")
+    return root
+
+
+def instance_rows(index):
+    return {row[0]: row for row in index.connection.execute("SELECT * FROM instances")}
+
+
+def test_rescan_only_reads_changed_files(tree, tmp_path, monkeypatch):
+    index = StudyIndex(str(tmp_path / "index.sqlite"))
+    assert index.scan(str(tree), max_workers=2) == (7, 0)
+    assert [(series["series_number"], series["instances"]) for series in index.series_list()] == [(1, 3), (2, 3)]
+    before = instance_rows(index)
+
+    read = []
+    read_index_record = study_index.read_index_record
+    monkeypatch.setattr(study_index, "read_index_record", lambda path: read.append(path) or read_index_record(path))
+    assert index.scan(str(tree), max_workers=2) == (0, 0)  # Nothing changed, nothing is read
+    assert read == []
+
+    touched = str(tree / "study" / "series1" / "2.dcm")
+    deleted = str(tree / "study" / "series2" / "3.dcm")
+    stat = os.stat(touched)
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    os.remove(deleted)
+    assert index.scan(str(tree), max_workers=2) == (1, 1)
+    assert read == [touched]
+
+    after = instance_rows(index)
+    assert set(before) - set(after) == {deleted}
+    assert after[touched][2] == stat.st_mtime_ns + 10 ** 9
+    assert {path: row for path, row in after.items() if path != touched} == \
+        {path: row for path, row in before.items() if path not in (touched, deleted)}
+    assert [(series["series_number"], series["instances"]) for series in index.series_list()] == [(1, 3), (2, 2)]
+    index.close()
+
+
+def test_removing_a_series_drops_its_orphans(tree, tmp_path):
+    index = StudyIndex(str(tmp_path / "index.sqlite"))
+    index.scan(str(tree), max_workers=2)
+    for name in os.listdir(tree / "study" / "series2"):
+        os.remove(tree / "study" / "series2" / name)
+    assert index.scan(str(tree), max_workers=2) == (0, 3)
+    assert [series["series_uid"] for series in index.series_list()] == ["1.2.3.1"]
+    assert index.series_files("1.2.3.2") == []
+    index.close()
@@ -0,0 +1,88 @@
+import gzip
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+import pytest
+from pydicom.dataset import Dataset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_export import write_volume  # noqa: E402
+
+ORIGIN = (-100.0, 50.0, 30.0)  # LPS, mm
+ROW_SPACING, COLUMN_SPACING, SLICE_SPACING = 0.5, 0.8, 2.5
+SLICES, ROWS, COLUMNS = 4, 3, 5
+
+
+def series():
+    """Headers and stored slices of a small axial series with anisotropic voxels."""
+    headers, slices = [], []
+    for index in range(SLICES):
+        header = Dataset()
+        header.Rows, header.Columns = ROWS, COLUMNS
+        header.PixelSpacing = [ROW_SPACING, COLUMN_SPACING]
+        header.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        header.ImagePositionPatient = [ORIGIN[0], ORIGIN[1], ORIGIN[2] + index * SLICE_SPACING]
+        header.SliceThickness = SLICE_SPACING
+        header.BitsAllocated, header.BitsStored = 16, 12  # CT range: rescaled values fit int16
+        header.PixelRepresentation = 0
+        header.RescaleSlope, header.RescaleIntercept = 1, -1024
+        headers.append(header)
+        slices.append(np.arange(ROWS * COLUMNS, dtype=np.uint16).reshape(ROWS, COLUMNS) * 10 + index * 1000)
+    return headers, slices
+
+
+def expected_volume():
+    return np.stack(series()[1]).astype(np.int16) - 1024
+
+
+def write(tmp_path, extension):
+    headers, slices = series()
+    output_path = str(tmp_path / f"volume{extension}")
+    assert write_volume(output_path, headers, iter(slices))
+    return output_path
+
+
+def test_npy_export(tmp_path):
+    volume = np.load(write(tmp_path, ".npy"))
+    assert volume.dtype == np.int16
+    np.testing.assert_array_equal(volume, expected_volume())
+
+
+def test_nifti_export(tmp_path):
+    with gzip.open(write(tmp_path, ".nii.gz"), "rb") as f:
+        data = f.read()
+    assert struct.unpack_from("<i", data, 0)[0] == 348
+    assert data[344:348] == b"n+1\0"
+    assert struct.unpack_from("<8h", data, 40)[:4] == (3, COLUMNS, ROWS, SLICES)
+    assert struct.unpack_from("<2h", data, 70) == (4, 16)  # int16
+    pixdim = struct.unpack_from("<8f", data, 76)
+    assert pixdim[1:4] == pytest.approx((COLUMN_SPACING, ROW_SPACING, SLICE_SPACING))
+    vox_offset = struct.unpack_from("<f", data, 108)[0]
+    assert struct.unpack_from("<2h", data, 252) == (1, 1)  # qform_code, sform_code
+    assert struct.unpack_from("<3f", data, 268) == pytest.approx((-ORIGIN[0], -ORIGIN[1], ORIGIN[2]))  # RAS
+    srow = np.array(struct.unpack_from("<12f", data, 280)).reshape(3, 4)
+    np.testing.assert_allclose(srow, [[-COLUMN_SPACING, 0, 0, -ORIGIN[0]],
+                                      [0, -ROW_SPACING, 0, -ORIGIN[1]],
+                                      [0, 0, SLICE_SPACING, ORIGIN[2]]], atol=1e-6)
+    volume = np.frombuffer(data, dtype="<i2", offset=int(vox_offset)).reshape(SLICES, ROWS, COLUMNS)
+    np.testing.assert_array_equal(volume, expected_volume())
+
+
+def test_metaimage_export(tmp_path):
+    with open(write(tmp_path, ".mha"), "rb") as f:
+        data = f.read()
+    header_end = data.index(b"ElementDataFile = LOCAL\n") + len(b"ElementDataFile = LOCAL\n")
+    fields = dict(line.split(" = ", 1) for line in data[:header_end].decode().splitlines())
+    assert [float(value) for value in fields["ElementSpacing"].split()] == \
+        pytest.approx([COLUMN_SPACING, ROW_SPACING, SLICE_SPACING])
+    assert [float(value) for value in fields["Offset"].split()] == pytest.approx(ORIGIN)
+    assert fields["DimSize"].split() == [str(COLUMNS), str(ROWS), str(SLICES)]
+    assert [float(value) for value in fields["TransformMatrix"].split()] == pytest.approx(np.eye(3).ravel())
+    assert fields["ElementType"] == "MET_SHORT"
+    assert int(fields["CompressedDataSize"]) == len(data) - header_end
+    volume = np.frombuffer(zlib.decompress(data[header_end:]), dtype="<i2").reshape(SLICES, ROWS, COLUMNS)
+    np.testing.assert_array_equal(volume, np.load(write(tmp_path, ".npy")))
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from pydicom.dataset import Dataset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from windowing import WindowLevel  # noqa: E402
+
+
+def direct_window(stored, center, width, slope=1.0, intercept=0.0):
+    """The DICOM linear VOI function (PS3.3 C.11.2.1.2), evaluated value by value."""
+    values = stored.astype(np.float64) * slope + intercept
+    low = center - 0.5 - (width - 1) / 2
+    high = center - 0.5 + (width - 1) / 2
+    display = ((values - (center - 0.5)) / (width - 1) + 0.5) * 255
+    return np.where(values <= low, 0, np.where(values > high, 255, display))
+
+
+@pytest.mark.parametrize("dtype, slope, intercept, center, width", [
+    (np.int16, 1.0, 0.0, 40.0, 400.0),  # Signed CT in HU, soft-tissue window
+    (np.int16, 1.0, 0.0, -600.0, 1500.0),  # Lung window, mostly negative HU
+    (np.uint16, 1.0, -1024.0, 40.0, 80.0),  # Unsigned CT with a rescale intercept
+    (np.uint16, 2.0, 0.0, 30000.0, 20000.0),  # Values past the signed 16-bit range
+])
+def test_16_bit_lut_matches_direct_formula(dtype, slope, intercept, center, width):
+    info = np.iinfo(dtype)
+    stored = np.arange(info.min, info.max + 1).astype(dtype)  # Every stored value
+    window = WindowLevel(center, width, slope, intercept)
+    windowed = window.apply(stored)
+    assert windowed.dtype == np.uint8
+    expected = direct_window(stored, center, width, slope, intercept)
+    assert np.abs(windowed - expected).max() < 1  # The LUT truncates to uint8
+    assert list(window.luts) == [np.dtype(dtype)]  # One table, built once for the dtype
+
+
+def test_signed_lut_maps_negative_values_through_their_bit_pattern():
+    window = WindowLevel(-1000.0, 100.0)
+    windowed = window.apply(np.array([-2000, -1000, 0], dtype=np.int16))
+    assert windowed.tolist() == [0, 128, 255]
+
+
+def test_monochrome1_is_inverted():
+    window = WindowLevel(0.0, 100.0, invert=True)
+    assert window.apply(np.array([-100, 100], dtype=np.int16)).tolist() == [255, 0]
+
+
+def test_header_window_takes_precedence():
+    dataset = Dataset()
+    dataset.WindowCenter = [40, 400]
+    dataset.WindowWidth = [400, 2000]
+    window = WindowLevel.from_dataset(dataset, np.array([0, 5000], dtype=np.int16))
+    assert (window.center, window.width) == (40.0, 400.0)
+
+
+def test_default_window_comes_from_the_first_frame():
+    """Without a header window, the viewer windows a file from its first frame only."""
+    dataset = Dataset()
+    dataset.RescaleSlope = 1
+    dataset.RescaleIntercept = -1024
+    frames = np.zeros((3, 4, 4), dtype=np.uint16)
+    frames[0] = np.linspace(1000, 1100, 16).reshape(4, 4)
+    frames[2] = 4000  # Later frames do not widen the window
+    window = WindowLevel.from_dataset(dataset, frames[0])
+    assert window.center == pytest.approx(26.0)
+    assert window.width == pytest.approx(100.0)
+    assert WindowLevel.from_dataset(dataset) is None
@@ -0,0 +1,46 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+def make_thumbnail(frame, max_size=250, window_level=None):
+    """Downsample a frame so its longest side is at most max_size and scale it to uint8.
+
+    Downsampling uses a plain stride, which is cheap enough to run for every
+    visible tile.  Grayscale frames go through `window_level` when given and
+    are otherwise stretched to their own min/max; RGB frames are passed through.
+    """
+    step = max(1, int(np.ceil(max(frame.shape[0], frame.shape[1]) / max_size)))
+    small = np.asarray(frame[::step, ::step])
+    if small.ndim == 3 and small.dtype == np.uint8:
+        return np.ascontiguousarray(small)
+    if small.ndim == 2 and window_level is not None:
+        return np.ascontiguousarray(window_level.apply(small))
+
+    small = small.astype(np.float32)
+    low, high = small.min(), small.max()
+    scale = 255.0 / (high - low) if high > low else 0.0
+    return np.ascontiguousarray((small - low) * scale, dtype=np.uint8)
+
+
+def write_png(file_path, image):
+    """Write a uint8 grayscale (rows, cols) or RGB (rows, cols, 3) image as PNG.
+
+    Only needs zlib, so thumbnails can be exported without Qt or matplotlib.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    color_type = 2 if image.ndim == 3 else 0  # RGB or grayscale
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data +
+                struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.insert(image.reshape(height, -1), 0, 0, axis=1)
+    with open(file_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DICOM_VIEWER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "dicom_viewer"))
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3  # 4 GB
+
+
+class VolumeCache:
+    """On-disk cache of decoded, sorted volumes, memory-mapped back on reopen.
+
+    Each entry is a raw `.npy` file plus a JSON sidecar describing its geometry.
+    Entries are keyed by SeriesInstanceUID and the path, size and mtime of every
+    source file, so editing or replacing any slice invalidates the entry.  The
+    sidecar's mtime records when the entry was last used; once the cache grows
+    past `max_bytes` the least recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key_for(self, series_uid, file_paths):
+        digest = hashlib.sha1(str(series_uid).encode())
+        for path in file_paths:
+            stat = os.stat(path)
+            digest.update(f"\0{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, key):
+        """Return (memory-mapped volume, metadata) for a key, or None on a miss."""
+        volume_path, sidecar_path = self._paths(key)
+        try:
+            with open(sidecar_path) as f:
+                metadata = json.load(f)
+            volume = np.load(volume_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        os.utime(sidecar_path)  # Mark as recently used
+        return volume, metadata
+
+    def store(self, key, volume, metadata):
+        """Write a volume and its metadata atomically, then enforce the size cap."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        volume_path, sidecar_path = self._paths(key)
+        suffix = f".{os.getpid()}.tmp"
+        with open(volume_path + suffix, "wb") as f:
+            np.save(f, np.ascontiguousarray(volume))
+        with open(sidecar_path + suffix, "w") as f:
+            json.dump(dict(metadata, shape=list(volume.shape), dtype=str(volume.dtype)), f)
+        # The volume goes in first, so a visible sidecar always has its data
+        os.replace(volume_path + suffix, volume_path)
+        os.replace(sidecar_path + suffix, sidecar_path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            volume_path, sidecar_path = self._paths(name[:-len(".json")])
+            try:
+                size = os.path.getsize(volume_path) + os.path.getsize(sidecar_path)
+                last_used = os.path.getmtime(sidecar_path)
+            except OSError:
+                continue
+            entries.append((last_used, size, volume_path, sidecar_path))
+            total += size
+
+        for _, size, volume_path, sidecar_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (sidecar_path, volume_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
@@ -0,0 +1,292 @@
+"""Export of a sorted DICOM series as a rescaled volume file.
+
+Slices are decoded, rescaled and written one at a time, so converting a
+series never needs the whole volume in memory.  Supported outputs:
+
+- `.nii.gz`: gzip-compressed NIfTI-1 with the patient geometry in its
+  qform/sform (RAS, as NIfTI requires),
+- `.mha`: zlib-compressed MetaImage (LPS, as ITK and VTK expect), which the
+  MPR viewer opens directly,
+- `.npy`: raw NumPy volume with a JSON sidecar holding the geometry.
+"""
+import gzip
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from series_loader import (
+    DEFAULT_WORKERS, decode_in_order, largest_series, read_headers, require_single_frame, series_geometry,
+    slice_normal
+)
+
+EXPORT_FORMATS = (".nii.gz", ".mha", ".npy")
+
+NIFTI_DATATYPES = {np.dtype(np.int16): 4, np.dtype(np.int32): 8, np.dtype(np.float32): 16}
+META_ELEMENT_TYPES = {np.dtype(np.int16): "MET_SHORT", np.dtype(np.int32): "MET_INT",
+                      np.dtype(np.float32): "MET_FLOAT"}
+
+
+def export_format(output_path):
+    """The export format of a file name, from its extension."""
+    for extension in EXPORT_FORMATS:
+        if output_path.lower().endswith(extension):
+            return extension
+    raise ValueError(f"unsupported volume format: {output_path} (use one of {', '.join(EXPORT_FORMATS)})")
+
+
+def rescale_parameters(header):
+    slope = float(header.get("RescaleSlope", 1.0) or 1.0)
+    intercept = float(header.get("RescaleIntercept", 0.0) or 0.0)
+    return slope, intercept
+
+
+def rescaled_dtype(headers):
+    """Smallest dtype holding every rescaled value of the series.
+
+    Integer rescaling keeps integers (int16 when the range fits); any other
+    slope or intercept gives float32.
+    """
+    parameters = [rescale_parameters(header) for header in headers]
+    if any(slope != 1.0 or not intercept.is_integer() for slope, intercept in parameters):
+        return np.dtype(np.float32)
+    header = headers[0]
+    bits = int(header.get("BitsStored", header.get("BitsAllocated", 16)))
+    if header.get("PixelRepresentation", 0) == 1:
+        low, high = -2 ** (bits - 1), 2 ** (bits - 1) - 1
+    else:
+        low, high = 0, 2 ** bits - 1
+    intercepts = [intercept for _, intercept in parameters]
+    low, high = low + min(intercepts), high + max(intercepts)
+    int16 = np.iinfo(np.int16)
+    return np.dtype(np.int16) if int16.min <= low and high <= int16.max else np.dtype(np.int32)
+
+
+def rescale(pixel_array, header, dtype):
+    slope, intercept = rescale_parameters(header)
+    if dtype.kind == 'f':
+        return (pixel_array.astype(np.float32) * slope + intercept).astype(dtype)
+    return (pixel_array.astype(np.int32) + int(intercept)).astype(dtype)
+
+
+def volume_geometry(headers):
+    """Origin, spacing (x, y, z) and unit axis directions (columns) of a sorted series, in LPS."""
+    geometry = series_geometry(headers)
+    slice_spacing, row_spacing, col_spacing = geometry["spacing"]
+    orientation = np.asarray(geometry["orientation"], dtype=float)
+    row_direction, col_direction = orientation[:3], orientation[3:]
+    slice_direction = slice_normal(headers[0])
+    if slice_direction is None:
+        slice_direction = np.cross(row_direction, col_direction)
+    positions = geometry["positions"]
+    if len(positions) > 1 and positions[0] and positions[-1]:
+        # Slices are sorted along the normal, but the stack can still run against it
+        step = np.subtract(positions[-1], positions[0])
+        if np.linalg.norm(step):
+            slice_direction = step / np.linalg.norm(step)
+    origin = np.asarray(positions[0] if positions and positions[0] else [0.0, 0.0, 0.0], dtype=float)
+    directions = np.column_stack([row_direction, col_direction, slice_direction])
+    return origin, np.array([col_spacing, row_spacing, slice_spacing]), directions
+
+
+def nifti_quaternion(rotation):
+    """quatern_b/c/d and qfac of a 3x3 rotation (possibly improper), as in nifti1_io."""
+    rotation = rotation.copy()
+    qfac = 1.0
+    if np.linalg.det(rotation) < 0:
+        rotation[:, 2] = -rotation[:, 2]
+        qfac = -1.0
+    (r11, r12, r13), (r21, r22, r23), (r31, r32, r33) = rotation
+    a = r11 + r22 + r33 + 1.0
+    if a > 0.5:
+        a = 0.5 * np.sqrt(a)
+        b, c, d = 0.25 * (r32 - r23) / a, 0.25 * (r13 - r31) / a, 0.25 * (r21 - r12) / a
+    else:
+        xd, yd, zd = 1.0 + r11 - (r22 + r33), 1.0 + r22 - (r11 + r33), 1.0 + r33 - (r11 + r22)
+        if xd > 1.0:
+            b = 0.5 * np.sqrt(xd)
+            c, d, a = 0.25 * (r12 + r21) / b, 0.25 * (r13 + r31) / b, 0.25 * (r32 - r23) / b
+        elif yd > 1.0:
+            c = 0.5 * np.sqrt(yd)
+            b, d, a = 0.25 * (r12 + r21) / c, 0.25 * (r23 + r32) / c, 0.25 * (r13 - r31) / c
+        else:
+            d = 0.5 * np.sqrt(zd)
+            b, c, a = 0.25 * (r13 + r31) / d, 0.25 * (r23 + r32) / d, 0.25 * (r21 - r12) / d
+        if a < 0:
+            b, c, d = -b, -c, -d
+    return (b, c, d), qfac
+
+
+def nifti_header(shape, dtype, origin, spacing, directions):
+    """A 348-byte NIfTI-1 header plus the empty extension flag."""
+    slices, rows, cols = shape
+    lps_to_ras = np.diag([-1.0, -1.0, 1.0])
+    rotation = lps_to_ras @ directions
+    offset = lps_to_ras @ origin
+    affine = np.column_stack([rotation * spacing, offset])
+    (quatern_b, quatern_c, quatern_d), qfac = nifti_quaternion(rotation)
+    header = struct.pack(
+        "<i10s18sihsb8h3fh2hh8f3fhbb2f2f2i80s24s2h6f12f16s4s",
+        348, b"", b"", 0, 0, b"r", 0,
+        3, cols, rows, slices, 1, 1, 1, 1,  # dim
+        0.0, 0.0, 0.0, 0,  # intent
+        NIFTI_DATATYPES[dtype], dtype.itemsize * 8, 0,
+        qfac, spacing[0], spacing[1], spacing[2], 1.0, 1.0, 1.0, 1.0,  # pixdim
+        352.0, 1.0, 0.0,  # vox_offset, scl_slope, scl_inter
+        0, 0, 2,  # slice_end, slice_code, xyzt_units (mm)
+        0.0, 0.0, 0.0, 0.0, 0, 0,
+        b"DICOM Viewer export", b"",
+        1, 1,  # qform_code, sform_code: scanner coordinates
+        quatern_b, quatern_c, quatern_d, offset[0], offset[1], offset[2],
+        *affine.ravel(),
+        b"", b"n+1\0",
+    )
+    return header + b"\0\0\0\0"
+
+
+class NiftiWriter:
+    """Streams slices into a gzip-compressed NIfTI-1 file."""
+
+    def __init__(self, output_path, shape, dtype, geometry):
+        self.file = gzip.open(output_path, "wb", compresslevel=6)
+        self.file.write(nifti_header(shape, dtype, *geometry))
+
+    def write_slice(self, index, slice_array):
+        self.file.write(np.ascontiguousarray(slice_array, dtype=slice_array.dtype.newbyteorder("<")).tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class MetaImageWriter:
+    """Streams slices into a zlib-compressed MetaImage (.mha) file.
+
+    The compressed size is only known at the end, so the header gets a
+    fixed-width placeholder that is filled in when the file is closed.
+    """
+    SIZE_DIGITS = 20
+
+    def __init__(self, output_path, shape, dtype, geometry):
+        slices, rows, cols = shape
+        origin, spacing, directions = geometry
+        self.file = open(output_path, "wb")
+        self.compressor = zlib.compressobj(6)
+        self.compressed_size = 0
+
+        def numbers(values):
+            return " ".join(f"{float(value):.10g}" for value in values)
+
+        header = [
+            "ObjectType = Image",
+            "NDims = 3",
+            "BinaryData = True",
+            "BinaryDataByteOrderMSB = False",
+            "CompressedData = True",
+            "CompressedDataSize = ",
+        ]
+        self.file.write(("\n".join(header)).encode())
+        self.size_offset = self.file.tell()
+        self.file.write(b"0" * self.SIZE_DIGITS + b"\n")
+        header = [
+            f"TransformMatrix = {numbers(directions.T.ravel())}",  # One row per axis direction
+            f"Offset = {numbers(origin)}",
+            "CenterOfRotation = 0 0 0",
+            f"ElementSpacing = {numbers(spacing)}",
+            f"DimSize = {cols} {rows} {slices}",
+            f"ElementType = {META_ELEMENT_TYPES[dtype]}",
+            "ElementDataFile = LOCAL",
+        ]
+        self.file.write(("\n".join(header) + "\n").encode())
+
+    def write_slice(self, index, slice_array):
+        data = np.ascontiguousarray(slice_array, dtype=slice_array.dtype.newbyteorder("<")).tobytes()
+        self.write_compressed(self.compressor.compress(data))
+
+    def write_compressed(self, data):
+        self.file.write(data)
+        self.compressed_size += len(data)
+
+    def close(self):
+        self.write_compressed(self.compressor.flush())
+        self.file.seek(self.size_offset)
+        self.file.write(str(self.compressed_size).zfill(self.SIZE_DIGITS).encode())
+        self.file.close()
+
+
+def write_numpy_sidecar(output_path, shape, dtype, geometry, **extra):
+    """Write the JSON geometry sidecar of a .npy volume, as read back by the MPR viewer."""
+    origin, spacing, directions = geometry
+    with open(os.path.splitext(output_path)[0] + ".json", "w") as f:
+        json.dump(dict({"origin": origin.tolist(), "spacing": spacing.tolist(),
+                        "directions": directions.T.tolist(), "shape": list(shape), "dtype": str(dtype),
+                        "axes": "slice, row, column; spacing and directions in x (column), y (row), z (slice) order"},
+                       **extra), f, indent=2)
+
+
+class NumpyWriter:
+    """Writes slices into a memory-mapped .npy file with a JSON geometry sidecar."""
+
+    def __init__(self, output_path, shape, dtype, geometry):
+        self.volume = open_memmap(output_path, mode="w+", dtype=dtype, shape=shape)
+        write_numpy_sidecar(output_path, shape, dtype, geometry)
+
+    def write_slice(self, index, slice_array):
+        self.volume[index] = slice_array
+
+    def close(self):
+        self.volume.flush()
+        del self.volume
+
+
+WRITERS = {".nii.gz": NiftiWriter, ".mha": MetaImageWriter, ".npy": NumpyWriter}
+
+
+def write_volume(output_path, headers, slices, progress=None, should_stop=None):
+    """Rescale and write the stored slices of a sorted series to output_path.
+
+    `slices` yields each slice's stored pixel array in the order of `headers`.
+    `progress(done, total)` is called after each slice; when `should_stop()`
+    returns True the partial file is removed and False is returned.
+    """
+    writer_class = WRITERS[export_format(output_path)]
+    first = headers[0]
+    if int(first.get("SamplesPerPixel", 1)) > 1:
+        raise ValueError("color series cannot be exported as a scalar volume")
+    dtype = rescaled_dtype(headers)
+    shape = (len(headers), int(first.Rows), int(first.Columns))
+
+    temp_path = f"{output_path}.{os.getpid()}.tmp{export_format(output_path)}"
+    writer = writer_class(temp_path, shape, dtype, volume_geometry(headers))
+    written = 0
+    try:
+        for header, pixel_array in zip(headers, slices):
+            if should_stop is not None and should_stop():
+                break
+            writer.write_slice(written, rescale(pixel_array, header, dtype))
+            written += 1
+            if progress is not None:
+                progress(written, len(headers))
+    finally:
+        if hasattr(slices, "close"):
+            slices.close()  # Stops decoding ahead
+        writer.close()
+        completed = written == len(headers)
+        if completed:
+            os.replace(temp_path, output_path)
+            if writer_class is NumpyWriter:
+                os.replace(os.path.splitext(temp_path)[0] + ".json", os.path.splitext(output_path)[0] + ".json")
+        else:
+            for path in (temp_path, os.path.splitext(temp_path)[0] + ".json"):
+                if os.path.exists(path):
+                    os.remove(path)
+    return completed
+
+
+def export_series(file_paths, output_path, max_workers=DEFAULT_WORKERS, progress=None, should_stop=None):
+    """Sort the largest series among the files and stream it to output_path, decoding one slice at a time."""
+    file_paths, headers = largest_series(file_paths, read_headers(file_paths, max_workers))
+    require_single_frame(file_paths, headers)
+    return write_volume(output_path, headers, decode_in_order(file_paths, max_workers), progress, should_stop)
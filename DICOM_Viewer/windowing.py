@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def first_value(value):
+    """Return the first value of a possibly multi-valued DICOM element."""
+    try:
+        return float(value[0])
+    except TypeError:
+        return float(value)
+
+
+class WindowLevel:
+    """Window/level stage mapping stored pixel values to 8-bit display values.
+
+    RescaleSlope/RescaleIntercept and the window are folded into one lookup
+    table over every possible stored value, so applying them to a frame (or a
+    whole volume) is a single table lookup.  The table only depends on the
+    window and the stored dtype; it is rebuilt when the window changes, never
+    per frame.  Dtypes wider than 16 bits are windowed arithmetically instead.
+    """
+
+    def __init__(self, center, width, slope=1.0, intercept=0.0, invert=False):
+        self.center = float(center)
+        self.width = max(float(width), 1.0)
+        self.slope = float(slope)
+        self.intercept = float(intercept)
+        self.invert = invert
+        self.luts = {}
+
+    @classmethod
+    def from_dataset(cls, dicom_data, pixels=None):
+        """Window from the DICOM WindowCenter/WindowWidth, else from the range of `pixels`.
+
+        Returns None when the header has no window and no pixels are given.
+        """
+        slope = float(dicom_data.get("RescaleSlope", 1.0) or 1.0)
+        intercept = float(dicom_data.get("RescaleIntercept", 0.0) or 0.0)
+        invert = dicom_data.get("PhotometricInterpretation", "") == "MONOCHROME1"
+        center, width = dicom_data.get("WindowCenter"), dicom_data.get("WindowWidth")
+        if center is not None and width is not None:
+            return cls(first_value(center), first_value(width), slope, intercept, invert)
+        if pixels is None:
+            return None
+        low = float(pixels.min()) * slope + intercept
+        high = float(pixels.max()) * slope + intercept
+        return cls((low + high) / 2, high - low, slope, intercept, invert)
+
+    def set_window(self, center, width):
+        self.center = float(center)
+        self.width = max(float(width), 1.0)
+        self.luts.clear()
+
+    def window_values(self, stored):
+        """Map stored values to 0..255 with the DICOM linear VOI function."""
+        values = stored * self.slope + self.intercept
+        display = (values - (self.center - 0.5)) / (self.width - 1 if self.width > 1 else 1) + 0.5
+        display = np.clip(display, 0.0, 1.0) * 255.0
+        if self.invert:
+            display = 255.0 - display
+        return display.astype(np.uint8)
+
+    def lut_for(self, dtype):
+        """Lookup table indexed by the stored values viewed as unsigned integers."""
+        lut = self.luts.get(dtype)
+        if lut is None:
+            bits = dtype.itemsize * 8
+            indices = np.arange(2 ** bits, dtype=np.int64)
+            if dtype.kind == 'i':
+                # Signed values are looked up through their unsigned bit pattern
+                indices = np.where(indices >= 2 ** (bits - 1), indices - 2 ** bits, indices)
+            lut = self.window_values(indices.astype(np.float64))
+            self.luts[dtype] = lut
+        return lut
+
+    def apply(self, pixels):
+        """Window a grayscale frame or volume to uint8; color data is returned unchanged."""
+        pixels = np.asarray(pixels)
+        if pixels.ndim >= 3 and pixels.shape[-1] in (3, 4) and pixels.dtype == np.uint8:
+            return pixels
+        if pixels.dtype.kind in 'iu' and pixels.dtype.itemsize <= 2:
+            return self.lut_for(pixels.dtype)[pixels.view(f"u{pixels.dtype.itemsize}")]
+        return self.window_values(pixels.astype(np.float64))
@@ -1,10 +1,15 @@
 import sys
 import os
+import math
 import vtk
-from PyQt5.QtWidgets import QApplication, QMainWindow, QGridLayout, QWidget, QFileDialog, QAction, QToolBar, QSlider, QVBoxLayout, QLabel, QPushButton, QHBoxLayout  # Add QHBoxLayout here
+from PyQt5.QtWidgets import QApplication, QMainWindow, QGridLayout, QWidget, QFileDialog, QAction, QToolBar, QSlider, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QProgressBar, QComboBox, QDoubleSpinBox  # Add QHBoxLayout here
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont
+from volume_geometry import AXIAL, CORONAL, SAGITTAL, VolumeGeometry
+from transfer_functions import PRESETS, TransferFunction
+from volume_statistics import VOLUME_PERCENTILES, statistics_for
+from volume_sources import DicomDirectorySource, MetaImageSource, NumpyVolumeSource, source_for_path
 
 dark_stylesheet = """
 QMainWindow {
@@ -57,6 +62,348 @@ QLabel {
     color: #FFFFFF;
 }
 """
+
+# Slab blend modes offered in the toolbar, by the vtkImageReslice slab mode they use
+SLAB_MODES = {"Single Slice": None, "MIP": "Max", "MinIP": "Min", "Average": "Mean"}
+DEFAULT_SLAB_THICKNESS = 10.0  # mm
+
+
+def slab_slices(thickness, spacing):
+    """Number of voxel planes a slab `thickness` mm thick spans at `spacing` mm per plane.
+
+    Always odd, so the slab is centred on the plane and samples whole voxel planes.
+    """
+    return max(1, int(thickness / spacing + 0.5) | 1)
+
+
+def set_reslice_slab(reslice, mode, slices):
+    """Blend `slices` planes centred on the reslice plane with a slab mode ("Max", "Min" or "Mean").
+
+    vtkImageReslice computes the slab while resampling, split across its
+    threads, so a thick slab costs no extra pipeline stage or GPU.
+    """
+    if mode is None or slices <= 1:
+        reslice.SetSlabNumberOfSlices(1)  # The plane itself
+        return
+    getattr(reslice, f"SetSlabModeTo{mode}")()
+    reslice.SetSlabNumberOfSlices(slices)
+
+
+class VolumeLoadThread(QThread):
+    """Runs a VTK reader off the GUI thread and hands over its output."""
+    progress = pyqtSignal(int)  # Percent
+    loaded = pyqtSignal(object)  # vtkImageData
+    failed = pyqtSignal(str)
+
+    def __init__(self, reader, parent=None):
+        super().__init__(parent)
+        self.reader = reader
+
+    def run(self):
+        errors = []
+        observers = [
+            self.reader.AddObserver(
+                "ProgressEvent", lambda obj, event: self.progress.emit(int(obj.GetProgress() * 100))),
+            self.reader.AddObserver("ErrorEvent", lambda obj, event: errors.append(event)),
+        ]
+        try:
+            self.reader.Update()
+        finally:
+            for observer in observers:
+                self.reader.RemoveObserver(observer)
+
+        image_data = self.reader.GetOutputDataObject(0)
+        if errors or image_data is None or image_data.GetPointData().GetScalars() is None:
+            self.failed.emit("the reader could not read the file")
+            return
+
+        # Detach the volume from the reader so the views never make it execute again on the GUI thread
+        volume = vtk.vtkImageData()
+        volume.ShallowCopy(image_data)
+        self.loaded.emit(volume)
+
+
+class RenderScheduler(QObject):
+    """Coalesces render requests into at most one render per view per display frame.
+
+    Views ask for a render with `request`; the renders happen together when
+    the frame timer fires, so a slider dragged across hundreds of slices
+    renders each view once per frame instead of once per slider step.
+    """
+    FRAME_MS = 16  # ~60 Hz
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = []  # Render windows waiting for the next frame, in request order
+        self.rendered = 0  # Renders done
+        self.skipped = 0  # Requests merged into a render that was already pending
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.FRAME_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self, vtk_widget):
+        render_window = vtk_widget.GetRenderWindow()
+        if render_window in self.pending:
+            self.skipped += 1
+            return
+        self.pending.append(render_window)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        # Render everything requested so far; requests made while rendering wait for the next frame
+        self.timer.stop()
+        pending, self.pending = self.pending, []
+        for render_window in pending:
+            render_window.Render()
+            self.rendered += 1
+
+
+class SlicePipeline:
+    """Reslice -> window/level -> image actor pipeline of one 2D panel.
+
+    Built once per panel; loading a volume only swaps the reslice input, so
+    no renderer or GPU resource is ever created twice for the same panel.
+    The plane sits on a voxel plane of `axis` in the shared oblique frame;
+    while that frame is not rotated, nearest-neighbour sampling shows the
+    voxels exactly, without interpolation.
+    """
+
+    def __init__(self, vtk_widget, orientation, axis, oblique_transform):
+        self.widget = vtk_widget
+        self.axis = axis  # Index axis the slices move along
+
+        # Set up a slice renderer
+        self.reslice = vtk.vtkImageReslice()
+        self.reslice.SetOutputDimensionality(2)
+        self.reslice.SetResliceAxesDirectionCosines(orientation)
+        self.reslice.SetInterpolationModeToNearestNeighbor()
+        self.reslice.SetResliceAxesOrigin(0, 0, 0)
+        # Rotation shared by all slice views; changing it re-executes each reslice once
+        self.reslice.SetResliceTransform(oblique_transform)
+        self.reslice.AutoCropOutputOn()  # Rotated planes still show the whole volume
+        self.reslice.SetNumberOfThreads(os.cpu_count() or 1)  # Thick slabs are resampled on every core
+
+        # Create a window/level filter to adjust brightness and contrast
+        self.window_level = vtk.vtkImageMapToWindowLevelColors()
+        self.window_level.SetInputConnection(self.reslice.GetOutputPort())
+
+        # Mapper and actor for displaying the slice
+        self.actor = vtk.vtkImageActor()
+        self.actor.GetMapper().SetInputConnection(self.window_level.GetOutputPort())
+
+        # The actor is only added once there is a volume to show
+        self.renderer = vtk.vtkRenderer()
+        vtk_widget.GetRenderWindow().AddRenderer(self.renderer)
+
+    def set_input(self, output_port, origin, window, level):
+        self.reslice.SetInputConnection(output_port)
+        self.reslice.SetResliceAxesOrigin(origin)
+        self.window_level.SetWindow(window)  # Adjusted contrast
+        self.window_level.SetLevel(level)  # Adjusted brightness
+        if not self.renderer.HasViewProp(self.actor):
+            self.renderer.AddActor(self.actor)
+        self.renderer.ResetCamera()
+
+    def set_slab(self, mode, thickness, geometry):
+        # The slab spans whole voxel planes along the view's axis
+        set_reslice_slab(self.reslice, mode, slab_slices(thickness, geometry.spacing[self.axis]))
+
+    def set_oblique(self, oblique):
+        # Rotated planes cut across voxels, so they are interpolated
+        if oblique:
+            self.reslice.SetInterpolationModeToLinear()
+        else:
+            self.reslice.SetInterpolationModeToNearestNeighbor()
+
+    def normal(self):
+        """Normal of the plane in the oblique frame, pointing towards the viewer."""
+        axes = self.reslice.GetResliceAxes()
+        x_axis = [axes.GetElement(row, 0) for row in range(3)]
+        y_axis = [axes.GetElement(row, 1) for row in range(3)]
+        normal = [0.0, 0.0, 0.0]
+        vtk.vtkMath.Cross(x_axis, y_axis, normal)
+        return normal
+
+    def picked_frame_point(self, picked_position):
+        """Coordinates in the oblique frame of a point picked on the displayed slice."""
+        output = self.reslice.GetOutput()
+        index = [0.0, 0.0, 0.0]
+        output.TransformPhysicalPointToContinuousIndex(picked_position, index)
+        # Point in the reslice frame, then through the reslice axes
+        point = [origin + spacing * i for origin, spacing, i in zip(output.GetOrigin(), output.GetSpacing(), index)]
+        return self.reslice.GetResliceAxes().MultiplyPoint(point + [1.0])[:3]
+
+
+# "gpu" or "cpu" forces the 3D view's mapper; "auto" picks from the OpenGL capabilities
+VOLUME_MAPPER = os.environ.get("MPR_VOLUME_MAPPER", "auto").lower()
+SOFTWARE_RENDERERS = ("llvmpipe", "softpipe", "swrast", "swiftshader", "software rasterizer")
+INTERACTIVE_IMAGE_SAMPLE_DISTANCE = 2.0  # Rays every 2 pixels while the camera moves
+INTERACTIVE_SAMPLE_FACTOR = 4.0  # and 4 times fewer samples along each ray
+
+
+def opengl_renderer(render_window):
+    """The OpenGL renderer string of a render window, e.g. "llvmpipe (LLVM 15.0.6, 256 bits)"."""
+    for line in (render_window.ReportCapabilities() or "").splitlines():
+        if line.startswith("OpenGL renderer string:"):
+            return line.split(":", 1)[1].strip()
+    return ""
+
+
+def select_volume_mapper(render_window, volume_property):
+    """The volume mapper to use on this machine and its name ("GPU" or "CPU").
+
+    The GPU ray caster is only used when the render window has a working
+    OpenGL context with a known, hardware-accelerated renderer: on software
+    OpenGL (Mesa llvmpipe, e.g. headless nodes) it takes seconds per frame,
+    and without a context its shaders fail to compile at render time, so
+    the multithreaded CPU ray caster is used instead.  IsRenderSupported
+    alone is not trusted, as it also passes without a usable context.
+    """
+    if VOLUME_MAPPER == "gpu":
+        return vtk.vtkGPUVolumeRayCastMapper(), "GPU"
+    if VOLUME_MAPPER != "cpu":
+        render_window.Render()  # Creates the OpenGL context the checks need
+        renderer = opengl_renderer(render_window).lower()
+        hardware = renderer and not any(name in renderer for name in SOFTWARE_RENDERERS)
+        if hardware and render_window.SupportsOpenGL():
+            gpu_mapper = vtk.vtkGPUVolumeRayCastMapper()
+            if gpu_mapper.IsRenderSupported(render_window, volume_property):
+                return gpu_mapper, "GPU"
+    cpu_mapper = vtk.vtkFixedPointVolumeRayCastMapper()
+    cpu_mapper.SetNumberOfThreads(os.cpu_count() or 1)
+    return cpu_mapper, "CPU"
+
+
+class VolumePipeline:
+    """Volume mapper, transfer functions and renderer of the 3D panel, built once.
+
+    The mapper is picked for the machine when the first volume is shown.
+    While the camera moves, the volume is rendered at a lower image and ray
+    sampling resolution, and at full quality again once interaction stops.
+    """
+
+    def __init__(self, vtk_widget):
+        self.widget = vtk_widget
+
+        # The 3D volume mapper, chosen once the render window can be queried
+        self.mapper = None
+        self.mapper_name = None
+        self.sample_distance = 1.0  # Full quality: one sample per voxel along each ray
+
+        # Create a volume property
+        self.property = vtk.vtkVolumeProperty()
+        self.property.ShadeOn()
+        self.property.SetInterpolationTypeToLinear()
+        self.opacity = vtk.vtkPiecewiseFunction()
+        self.property.SetScalarOpacity(self.opacity)
+        self.color = vtk.vtkColorTransferFunction()
+        self.property.SetColor(self.color)
+        self.transfer_function = TransferFunction()
+        self.default_range = (0.0, 1.0)  # Default window of the volume, low to high
+
+        # Create a volume actor
+        self.volume = vtk.vtkVolume()
+        self.volume.SetProperty(self.property)
+
+        # Create the renderer for the 3D view
+        self.renderer = vtk.vtkRenderer()
+        vtk_widget.GetRenderWindow().AddRenderer(self.renderer)
+
+        # Drop to the interactive level of detail while the camera moves
+        style = vtk.vtkInteractorStyleTrackballCamera()
+        style.AddObserver("StartInteractionEvent", lambda obj, event: self.set_interactive(True))
+        style.AddObserver("EndInteractionEvent", lambda obj, event: self.set_interactive(False))
+        vtk_widget.GetRenderWindow().GetInteractor().SetInteractorStyle(style)
+
+    def set_input(self, output_port, window, level):
+        if self.mapper is None:
+            self.mapper, self.mapper_name = select_volume_mapper(self.widget.GetRenderWindow(), self.property)
+            self.volume.SetMapper(self.mapper)
+        self.mapper.SetInputConnection(output_port)
+        image_data = output_port.GetProducer().GetOutputDataObject(output_port.GetIndex())
+        self.sample_distance = min(image_data.GetSpacing())
+        self.set_interactive(False)
+
+        # Relative transfer functions follow the window of the new volume
+        self.default_range = (level - window / 2, level + window / 2)
+        self.update_transfer_function()
+
+        if not self.renderer.HasViewProp(self.volume):
+            self.renderer.AddVolume(self.volume)
+        self.renderer.ResetCamera()
+
+    def update_transfer_function(self):
+        # Edits the existing opacity and color functions; the volume is not uploaded again
+        self.transfer_function.apply(self.opacity, self.color, *self.default_range)
+
+    def set_interactive(self, interactive):
+        # Fixed sample distances, so the level of detail is exactly what is asked for
+        if self.mapper is None:
+            return
+        self.mapper.SetAutoAdjustSampleDistances(0)
+        if interactive:
+            self.mapper.SetImageSampleDistance(INTERACTIVE_IMAGE_SAMPLE_DISTANCE)
+            self.mapper.SetSampleDistance(self.sample_distance * INTERACTIVE_SAMPLE_FACTOR)
+        else:
+            self.mapper.SetImageSampleDistance(1.0)
+            self.mapper.SetSampleDistance(self.sample_distance)
+
+
+class TransferFunctionEditor(QWidget):
+    """Preset and shift/width/opacity controls for the 3D view's transfer function."""
+    changed = pyqtSignal()
+
+    def __init__(self, transfer_function, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Transfer Function")
+        self.transfer_function = transfer_function
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel("Preset"))
+        self.preset_box = QComboBox()
+        self.preset_box.addItems(PRESETS)
+        self.preset_box.setCurrentText(transfer_function.preset)
+        self.preset_box.currentTextChanged.connect(self.on_preset_changed)
+        layout.addWidget(self.preset_box)
+
+        # Slider positions are percent of the volume's default window, of the preset's width and of its opacity
+        self.shift_slider = self.add_slider(layout, "Shift", -100, 100, 0)
+        self.width_slider = self.add_slider(layout, "Width", 10, 400, 100)
+        self.opacity_slider = self.add_slider(layout, "Opacity", 0, 200, 100)
+
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        layout.addWidget(reset_button)
+
+    def add_slider(self, layout, title, minimum, maximum, value):
+        layout.addWidget(QLabel(title))
+        slider = QSlider(Qt.Horizontal)
+        slider.setRange(minimum, maximum)
+        slider.setValue(value)
+        slider.valueChanged.connect(self.on_slider_changed)
+        layout.addWidget(slider)
+        return slider
+
+    def on_slider_changed(self):
+        self.transfer_function.shift = self.shift_slider.value() / 100
+        self.transfer_function.width = self.width_slider.value() / 100
+        self.transfer_function.opacity = self.opacity_slider.value() / 100
+        self.changed.emit()
+
+    def on_preset_changed(self, name):
+        self.transfer_function.preset = name
+        self.reset()
+
+    def reset(self):
+        for slider, value in ((self.shift_slider, 0), (self.width_slider, 100), (self.opacity_slider, 100)):
+            slider.blockSignals(True)
+            slider.setValue(value)
+            slider.blockSignals(False)
+        self.on_slider_changed()
+
+
 class MPRWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -73,13 +420,46 @@ class MPRWindow(QMainWindow):
         self.sagittal_view, self.sagittal_slider, self.sagittal_reset = self.create_vtk_panel_with_slider(1, 1, "Sagittal View")
         self.three_d_view = self.create_vtk_panel(1, 0, "3D View")
 
-        # Placeholder for reslice objects to update slices
+        # Maps the frame the slice planes are laid out in to the volume's data coordinates
+        self.oblique_transform = vtk.vtkTransform()
+
+        # One pipeline per panel, fed every volume that is loaded
+        self.axial_pipeline = SlicePipeline(
+            self.axial_view, [1, 0, 0, 0, 1, 0, 0, 0, 1], AXIAL, self.oblique_transform)  # Axial
+        self.coronal_pipeline = SlicePipeline(
+            # The slicing axis points along +y: vtkImageReslice offsets slabs by a slice along a negative one
+            self.coronal_view, [1, 0, 0, 0, 0, 1, 0, 1, 0], CORONAL, self.oblique_transform)  # Coronal
+        self.sagittal_pipeline = SlicePipeline(
+            self.sagittal_view, [0, 1, 0, 0, 0, 1, 1, 0, 0], SAGITTAL, self.oblique_transform)  # Sagittal
+        self.slice_pipelines = [self.axial_pipeline, self.coronal_pipeline, self.sagittal_pipeline]
+        self.rotation_drag = None  # (pipeline, last angle) while a plane rotation is dragged
+        self.slab_mode = None  # Slab mode of the slice views, None for single slices
+        self.transfer_function_editor = None  # Opened from the toolbar
+        self.slab_thickness = DEFAULT_SLAB_THICKNESS
+        self.volume_pipeline = VolumePipeline(self.three_d_view)
+
+        # The slice views reslice the volume along its own index axes, so they see it without its direction
+        self.index_aligned = vtk.vtkImageChangeInformation()
+        self.index_aligned.SetOutputDirection((1, 0, 0, 0, 1, 0, 0, 0, 1))
+
+        # Reslice objects to update slices, set once a volume is shown
         self.axial_reslice = None
         self.coronal_reslice = None
         self.sagittal_reslice = None
 
-        # DICOM reader placeholder
+        # Volume source and the producer of its loaded volume
+        self.volume_source = None
         self.reader = None
+        self.geometry = None  # Index <-> world mapping of the loaded volume
+        self.load_thread = None  # Reads the volume in the background
+        self.pending_views = []  # Views still to be built after the axial one
+        self.render_scheduler = RenderScheduler(self)  # Slice and click updates render through it
+
+        # Status bar with the loading progress
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
 
         # Create a toolbar with an upload action
         self.create_toolbar()
@@ -104,6 +484,7 @@ class MPRWindow(QMainWindow):
         upload_action = QAction(QIcon(r"C:\Users\monae\Downloads\download-removebg-preview.png"), "Upload DICOM", self)
         upload_action.setStatusTip("Upload DICOM files")
         upload_action.triggered.connect(self.upload_file)
+        self.upload_action = upload_action
 
         # Add the upload action to the toolbar
         toolbar.addAction(upload_action)
@@ -116,6 +497,38 @@ class MPRWindow(QMainWindow):
         # Add the mouse controls action to the toolbar
         toolbar.addAction(mouse_controls_action)
 
+        # Dragging in a slice view rotates the planes while this is checked
+        self.rotate_action = QAction("Rotate Planes", self)
+        self.rotate_action.setCheckable(True)
+        self.rotate_action.setStatusTip("Drag in a slice view to rotate the planes around its normal")
+        toolbar.addAction(self.rotate_action)
+
+        reset_planes_action = QAction("Reset Planes", self)
+        reset_planes_action.setStatusTip("Return the slice planes to the volume axes")
+        reset_planes_action.triggered.connect(self.reset_planes)
+        toolbar.addAction(reset_planes_action)
+
+        # Opacity and color of the 3D view
+        transfer_function_action = QAction("Transfer Function", self)
+        transfer_function_action.setStatusTip("Edit the opacity and colors of the 3D view")
+        transfer_function_action.triggered.connect(self.show_transfer_function_editor)
+        toolbar.addAction(transfer_function_action)
+
+        # Thick slab blend mode and thickness of the slice views
+        toolbar.addSeparator()
+        toolbar.addWidget(QLabel("Slab: "))
+        self.slab_mode_box = QComboBox()
+        self.slab_mode_box.addItems(SLAB_MODES)
+        self.slab_mode_box.currentTextChanged.connect(lambda name: self.set_slab(SLAB_MODES[name], self.slab_thickness))
+        toolbar.addWidget(self.slab_mode_box)
+        self.slab_thickness_box = QDoubleSpinBox()
+        self.slab_thickness_box.setRange(0.5, 200.0)
+        self.slab_thickness_box.setSingleStep(1.0)
+        self.slab_thickness_box.setSuffix(" mm")
+        self.slab_thickness_box.setValue(DEFAULT_SLAB_THICKNESS)
+        self.slab_thickness_box.valueChanged.connect(lambda thickness: self.set_slab(self.slab_mode, thickness))
+        toolbar.addWidget(self.slab_thickness_box)
+
     def create_vtk_panel_with_slider(self, row, col, title):
         # Create a horizontal layout to combine the panel and the slider
         combined_layout = QHBoxLayout()
@@ -192,237 +605,304 @@ class MPRWindow(QMainWindow):
             self.update_slice(0, 1, 1)  # Update slice correctly for sagittal view
 
     def upload_file(self):
-        # Open a file dialog to select a DICOM or MHA file
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "",
-                                                   "DICOM Files (*.dcm);;MHA Files (*.mha);;All Files (*)")
+        # Open a file dialog to select a volume file
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select File", "",
+            "DICOM Files (*.dcm);;MHA Files (*.mha *.mhd);;NRRD Files (*.nrrd *.nhdr);;"
+            "NIfTI Files (*.nii *.nii.gz);;NumPy Files (*.npy);;All Files (*)")
         if file_path:
-            # Check the file extension to determine the type
-            if file_path.endswith('.dcm'):
-                self.load_dicom_data(file_path)
-            elif file_path.endswith('.mha'):
-                self.load_mha_data(file_path)
-
-    def load_dicom_data(self, dicom_file):
-        try:
-            # Load DICOM data using vtkDICOMImageReader
-            reader = vtk.vtkDICOMImageReader()
-            reader.SetDirectoryName(os.path.dirname(dicom_file))  # Set directory for DICOM files
-            reader.Update()
-
-            if reader.GetOutput() is None:
-                print("Error: Failed to load DICOM data")
+            # The file extension determines the reader
+            try:
+                source = source_for_path(file_path)
+            except (ValueError, OSError) as e:
+                self.statusBar().showMessage(f"Cannot open {file_path}: {e}", 5000)
                 return
+            self.load_volume(source)
 
-            self.reader = reader
-
-            # Get the number of slices for each orientation
-            dimensions = reader.GetOutput().GetDimensions()  # Get dimensions of the volume
-            self.axial_slices = dimensions[2]  # Depth
-            self.coronal_slices = dimensions[1]  # Height
-            self.sagittal_slices = dimensions[0]  # Width
-
-            # Set slider ranges according to the number of slices
-            self.axial_slider.setRange(0, self.axial_slices - 1)
-            self.coronal_slider.setRange(0, self.coronal_slices - 1)
-            self.sagittal_slider.setRange(0, self.sagittal_slices - 1)
-
-            # Initialize sliders to the first slice
-            self.axial_slider.setValue(0)
-            self.coronal_slider.setValue(0)
-            self.sagittal_slider.setValue(0)
-
-            # Setup renderers for each view (axial, coronal, sagittal)
-            self.axial_reslice = self.setup_slice_view(self.axial_view, reader, [1, 0, 0, 0, 1, 0, 0, 0, 1], 0)  # Axial
-            self.coronal_reslice = self.setup_slice_view(self.coronal_view, reader, [1, 0, 0, 0, 0, 1, 0, -1, 0],
-                                                         0)  # Coronal
-
-            # Update sagittal orientation to switch axes
-            self.sagittal_reslice = self.setup_slice_view(self.sagittal_view, reader, [0, 1, 0, 0, 0, 1, 1, 0, 0],
-                                                          0)  # Sagittal
-
-            # Create 3D volume rendering in the bottom-left panel
-            self.setup_3d_view(self.three_d_view, reader)
-
-        except Exception as e:
-            print(f"Error loading DICOM file: {e}")
+    def load_dicom_data(self, dicom_file):
+        # Load the DICOM directory containing the file
+        self.load_volume(DicomDirectorySource(os.path.dirname(dicom_file)))
 
     def load_mha_data(self, mha_file):
+        self.load_volume(MetaImageSource(mha_file))
+
+    def load_volume(self, source):
+        # Read on a worker thread; the views are built once the volume is there
+        if self.load_thread is not None:
+            self.statusBar().showMessage("A volume is already loading.", 5000)
+            return
+        kind = source.kind
+        self.load_thread = VolumeLoadThread(source.create_reader(), self)
+        self.load_thread.progress.connect(self.progress_bar.setValue)
+        self.load_thread.loaded.connect(lambda volume: self.on_volume_loaded(source, volume))
+        self.load_thread.failed.connect(lambda message: self.on_volume_failed(kind, message))
+        self.load_thread.finished.connect(self.on_load_thread_finished)
+        self.upload_action.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage(f"Loading {kind} data...")
+        self.load_thread.start()
+
+    def show_array(self, array, spacing=(1.0, 1.0, 1.0), origin=(0.0, 0.0, 0.0), direction=None):
+        """Show a (slices, rows, columns) NumPy volume without copying it.
+
+        `spacing` and `origin` are in x (column), y (row), z (slice) order and
+        the columns of `direction` are the directions of those axes.  Returns
+        the array the views read from (the same array when it is C-contiguous);
+        write into it and call `volume_modified` to update the views.
+        """
+        if self.load_thread is not None:
+            self.statusBar().showMessage("A volume is already loading.", 5000)
+            return None
+        source = NumpyVolumeSource(array, spacing, origin, direction)
+        self.on_volume_loaded(source, source.create_image())
+        return source.array
+
+    def volume_modified(self):
+        # The array was changed in place: mark the scalars stale so the views re-execute
+        if self.reader is None:
+            return
+        image = self.reader.GetOutputDataObject(0)
+        image.GetPointData().GetScalars().Modified()
+        image.Modified()
+        for view in (self.axial_view, self.coronal_view, self.sagittal_view, self.three_d_view):
+            self.render_scheduler.request(view)
+
+    def on_load_thread_finished(self):
+        self.load_thread = None
+        self.upload_action.setEnabled(True)
+        self.progress_bar.setVisible(False)
+
+    def on_volume_failed(self, kind, message):
+        print(f"Error loading {kind} file: {message}")
+        self.statusBar().showMessage(f"Error loading {kind} file: {message}", 5000)
+
+    def on_volume_loaded(self, source, volume):
+        # The views read from the loaded volume instead of the file reader
+        reader = vtk.vtkTrivialProducer()
+        reader.SetOutput(volume)
+        self.reader = reader
+        self.volume_source = source  # Keeps memory the volume may point into alive
+        self.geometry = VolumeGeometry(volume)
+        self.reset_planes()  # A new volume starts on its own axes
+        self.set_slab(self.slab_mode, self.slab_thickness)  # Slab planes depend on the spacing
+        self.index_aligned.SetInputConnection(reader.GetOutputPort())
+        self.index_aligned.Update()
+
+        # Get the number of slices for each orientation
+        dimensions = volume.GetDimensions()  # Get dimensions of the volume
+        self.axial_slices = dimensions[2]  # Depth
+        self.coronal_slices = dimensions[1]  # Height
+        self.sagittal_slices = dimensions[0]  # Width
+
+        # Set slider ranges according to the number of slices
+        self.axial_slider.setRange(0, self.axial_slices - 1)
+        self.coronal_slider.setRange(0, self.coronal_slices - 1)
+        self.sagittal_slider.setRange(0, self.sagittal_slices - 1)
+
+        # Initialize sliders to the first slice
+        self.axial_slider.setValue(0)
+        self.coronal_slider.setValue(0)
+        self.sagittal_slider.setValue(0)
+
+        # Show the axial view right away; the other views follow, one per event loop pass
+        self.axial_reslice = self.setup_slice_view(self.axial_pipeline, self.index_aligned)  # Axial
+        self.pending_views = [self.setup_coronal_view, self.setup_sagittal_view,
+                              lambda: self.setup_3d_view(self.volume_pipeline, reader)]
+        self.statusBar().showMessage("Building views...")
+        QTimer.singleShot(0, self.build_next_view)
+
+    def setup_coronal_view(self):
+        self.coronal_reslice = self.setup_slice_view(self.coronal_pipeline, self.index_aligned)  # Coronal
+
+    def setup_sagittal_view(self):
+        self.sagittal_reslice = self.setup_slice_view(self.sagittal_pipeline, self.index_aligned)  # Sagittal
+
+    def build_next_view(self):
+        if not self.pending_views:
+            return
         try:
-            # Load MHA data using vtkMetaImageReader
-            reader = vtk.vtkMetaImageReader()
-            reader.SetFileName(mha_file)  # Set the MHA file
-            reader.Update()
-
-            if reader.GetOutput() is None:
-                print("Error: Failed to load MHA data")
-                return
-
-            self.reader = reader
-
-            # Get the number of slices for each orientation
-            dimensions = reader.GetOutput().GetDimensions()  # Get dimensions of the volume
-            self.axial_slices = dimensions[2]  # Depth
-            self.coronal_slices = dimensions[1]  # Height
-            self.sagittal_slices = dimensions[0]  # Width
-
-            # Set slider ranges according to the number of slices
-            self.axial_slider.setRange(0, self.axial_slices - 1)
-            self.coronal_slider.setRange(0, self.coronal_slices - 1)
-            self.sagittal_slider.setRange(0, self.sagittal_slices - 1)
-
-            # Initialize sliders to the first slice
-            self.axial_slider.setValue(0)
-            self.coronal_slider.setValue(0)
-            self.sagittal_slider.setValue(0)
-
-            # Setup renderers for each view (axial, coronal, sagittal)
-            self.axial_reslice = self.setup_slice_view(self.axial_view, reader, [1, 0, 0, 0, 1, 0, 0, 0, 1], 0)  # Axial
-            self.coronal_reslice = self.setup_slice_view(self.coronal_view, reader, [1, 0, 0, 0, 0, 1, 0, -1, 0],
-                                                         0)  # Coronal
-
-            # Update sagittal orientation to switch axes
-            self.sagittal_reslice = self.setup_slice_view(self.sagittal_view, reader, [0, 1, 0, 0, 0, 1, 1, 0, 0],
-                                                          0)  # Sagittal
-
-            # Create 3D volume rendering in the bottom-left panel
-            self.setup_3d_view(self.three_d_view, reader)
-
+            self.pending_views.pop(0)()
         except Exception as e:
-            print(f"Error loading MHA file: {e}")
-
-    def calculate_window_level(self, image_data):
-        scalar_range = image_data.GetScalarRange()
-        min_val, max_val = scalar_range[0], scalar_range[1]
-
-        # Compute window (contrast) and level (brightness)
-        default_window = max_val - min_val  # Window is the range of intensity values
-        default_level = (max_val + min_val) / 2  # Level is the midpoint
-
-        return default_window, default_level
-
-    def setup_slice_view(self, vtk_widget, reader, orientation, slice_index):
-        # Set up a slice renderer
-        reslice = vtk.vtkImageReslice()
-        reslice.SetInputConnection(reader.GetOutputPort())
-        reslice.SetOutputDimensionality(2)
-        reslice.SetResliceAxesDirectionCosines(orientation)
-        reslice.SetInterpolationModeToLinear()
-        reslice.SetResliceAxesOrigin(0, 0, slice_index)
-
-        # Get image data and calculate dynamic window/level
-        image_data = reader.GetOutput()
-        default_window, default_level = self.calculate_window_level(image_data)
-
-        # Create a window/level filter to adjust brightness and contrast
-        window_level = vtk.vtkImageMapToWindowLevelColors()
-        window_level.SetInputConnection(reslice.GetOutputPort())
+            self.pending_views = []
+            print(f"Error building views: {e}")
+            self.statusBar().showMessage(f"Error building views: {e}", 5000)
+            return
+        if self.pending_views:
+            QTimer.singleShot(0, self.build_next_view)
+        else:
+            self.statusBar().showMessage(
+                f"Volume loaded. 3D view: {self.volume_pipeline.mapper_name} volume rendering.", 5000)
 
-        # Set window (contrast) and level (brightness) dynamically
-        window_level.SetWindow(default_window)  # Adjusted contrast
-        window_level.SetLevel(default_level)  # Adjusted brightness
-        # Mapper and actor for displaying the slice
-        slice_mapper = vtk.vtkImageActor()
-        slice_mapper.GetMapper().SetInputConnection(window_level.GetOutputPort())
+    def closeEvent(self, event):
+        # The reader cannot be interrupted, so let it finish before the window goes away
+        if self.load_thread is not None:
+            self.load_thread.wait()
+        super().closeEvent(event)
 
-        # Create a renderer for the specific view
-        renderer = vtk.vtkRenderer()
-        renderer.AddActor(slice_mapper)
+    def setup_slice_view(self, pipeline, reader):
+        # Percentile window/level from the volume's histogram, computed once per volume
+        default_window, default_level = statistics_for(reader.GetOutputDataObject(0)).window_level()
 
-        # Set up the VTK render window and interactor for the specific panel
-        vtk_widget.GetRenderWindow().AddRenderer(renderer)
-
-        # Set interactor style to lock view for 2D slices (Axial, Coronal, Sagittal)
-        interactor = vtk_widget.GetRenderWindow().GetInteractor()
-        interactor.SetInteractorStyle(vtk.vtkInteractorStyleImage())
+        # Point the panel's existing pipeline at the first voxel plane of the new volume
+        origin = self.geometry.slice_point(pipeline.axis, 0)
+        pipeline.set_input(reader.GetOutputPort(), origin, default_window, default_level)
 
         # Initialize and render the interactor
-        vtk_widget.GetRenderWindow().Render()
-        vtk_widget.GetRenderWindow().GetInteractor().Initialize()
-
-        return reslice
+        pipeline.widget.GetRenderWindow().Render()
+        pipeline.widget.GetRenderWindow().GetInteractor().Initialize()
 
-    def setup_3d_view(self, vtk_widget, reader):
-        # Create a 3D volume rendering of the data
-        volume_mapper = vtk.vtkGPUVolumeRayCastMapper()
-        volume_mapper.SetInputConnection(reader.GetOutputPort())
+        return pipeline.reslice
 
-        # Get image data and calculate dynamic window/level
-        image_data = reader.GetOutput()
-        default_window, default_level = self.calculate_window_level(image_data)
+    def setup_3d_view(self, pipeline, reader):
+        # Transfer-function range from the same cached histogram, a little wider than the slice window
+        default_window, default_level = statistics_for(reader.GetOutputDataObject(0)).window_level(VOLUME_PERCENTILES)
 
-        # Create a volume property
-        volume_property = vtk.vtkVolumeProperty()
-        volume_property.ShadeOn()
-        volume_property.SetInterpolationTypeToLinear()
-
-        # Set scalar opacity based on calculated window/level
-        opacity = vtk.vtkPiecewiseFunction()
-        opacity.AddPoint(default_level - default_window / 2, 0.0)
-        opacity.AddPoint(default_level + default_window / 2, 1.0)
-        volume_property.SetScalarOpacity(opacity)
-
-        # Set color transfer function for brightness/contrast control
-        color = vtk.vtkColorTransferFunction()
-        color.AddRGBPoint(default_level - default_window / 2, 0.0, 0.0, 0.0)
-        color.AddRGBPoint(default_level + default_window / 2, 1.0, 1.0, 1.0)
-        volume_property.SetColor(color)
-
-        # Create a volume actor
-        volume = vtk.vtkVolume()
-        volume.SetMapper(volume_mapper)
-        volume.SetProperty(volume_property)
-
-        # Create the renderer for the 3D view
-        renderer = vtk.vtkRenderer()
-        renderer.AddVolume(volume)
-        vtk_widget.GetRenderWindow().AddRenderer(renderer)
+        # Feed the volume to the existing mapper and update the transfer functions
+        pipeline.set_input(reader.GetOutputPort(), default_window, default_level)
 
         # Initialize the interactor for the 3D view
-        interactor = vtk_widget.GetRenderWindow().GetInteractor()
+        interactor = pipeline.widget.GetRenderWindow().GetInteractor()
         interactor.Initialize()
-        vtk_widget.GetRenderWindow().Render()
+        pipeline.widget.GetRenderWindow().Render()
 
     def update_slice(self, value, row, col):
         # Update the slice based on which panel's slider is moved
         if row == 0 and col == 0:  # Axial
-            if self.axial_reslice:
-                if value < self.axial_slices:  # Check within range
-                    self.axial_reslice.SetResliceAxesOrigin(0, 0, value)  # Axial slices move along Z-axis
-                    self.axial_view.GetRenderWindow().Render()
+            self.move_slice(self.axial_pipeline, self.axial_reslice, value, self.axial_slices)
         elif row == 0 and col == 1:  # Coronal
-            if self.coronal_reslice:
-                if value < self.coronal_slices:  # Check within range
-                    self.coronal_reslice.SetResliceAxesOrigin(0, value, 0)  # Coronal slices move along Y-axis
-                    self.coronal_view.GetRenderWindow().Render()
+            self.move_slice(self.coronal_pipeline, self.coronal_reslice, value, self.coronal_slices)
         elif row == 1 and col == 1:  # Sagittal
-            if self.sagittal_reslice:
-                if value < self.sagittal_slices:  # Check within range
-                    self.sagittal_reslice.SetResliceAxesOrigin(value, 0, 0)  # Sagittal slices move along X-axis
-                    self.sagittal_view.GetRenderWindow().Render()
+            self.move_slice(self.sagittal_pipeline, self.sagittal_reslice, value, self.sagittal_slices)
+
+    def move_slice(self, pipeline, reslice, value, slices):
+        if reslice and value < slices:  # Check the view is set up and the slice within range
+            # Slices move along the pipeline's index axis, landing exactly on a voxel plane
+            reslice.SetResliceAxesOrigin(self.geometry.slice_point(pipeline.axis, value))
+            self.render_scheduler.request(pipeline.widget)
 
     def setup_vtk_interaction(self):
         # Set up interactor for axial, coronal, and sagittal views to capture mouse clicks
-        self.setup_interactor(self.axial_view, self.on_click_axial)
-        self.setup_interactor(self.coronal_view, self.on_click_coronal)
-        self.setup_interactor(self.sagittal_view, self.on_click_sagittal)
+        self.setup_interactor(self.axial_view, self.on_click_axial, self.axial_pipeline)
+        self.setup_interactor(self.coronal_view, self.on_click_coronal, self.coronal_pipeline)
+        self.setup_interactor(self.sagittal_view, self.on_click_sagittal, self.sagittal_pipeline)
 
-    def setup_interactor(self, vtk_widget, click_callback):
+    def setup_interactor(self, vtk_widget, click_callback, pipeline):
         interactor = vtk_widget.GetRenderWindow().GetInteractor()
         style = vtk.vtkInteractorStyleImage()
         interactor.SetInteractorStyle(style)
         interactor.AddObserver("LeftButtonPressEvent", click_callback)
 
+        # Observers on the style replace its own handling, so left drags can rotate the planes instead
+        style.AddObserver("LeftButtonPressEvent", lambda obj, event: self.on_rotation_press(obj, pipeline))
+        style.AddObserver("MouseMoveEvent", lambda obj, event: self.on_rotation_move(obj, pipeline))
+        style.AddObserver("LeftButtonReleaseEvent", lambda obj, event: self.on_rotation_release(obj))
+
+    def drag_angle(self, style):
+        # Angle of the mouse around the centre of the view, in degrees
+        interactor = style.GetInteractor()
+        x, y = interactor.GetEventPosition()
+        width, height = interactor.GetRenderWindow().GetSize()
+        return math.degrees(math.atan2(y - height / 2, x - width / 2))
+
+    def on_rotation_press(self, style, pipeline):
+        if self.rotate_action.isChecked() and pipeline.reslice.GetInputConnection(0, 0) is not None:
+            self.rotation_drag = (pipeline, self.drag_angle(style))
+        else:
+            style.OnLeftButtonDown()
+
+    def on_rotation_move(self, style, pipeline):
+        if self.rotation_drag is not None and self.rotation_drag[0] is pipeline:
+            angle = self.drag_angle(style)
+            self.rotate_planes(pipeline, angle - self.rotation_drag[1])
+            self.rotation_drag = (pipeline, angle)
+        else:
+            style.OnMouseMove()
+
+    def on_rotation_release(self, style):
+        if self.rotation_drag is not None:
+            self.rotation_drag = None
+        else:
+            style.OnLeftButtonUp()
+
+    def crosshair_point(self):
+        """Data coordinates where the three slice planes meet."""
+        frame_point = self.geometry.index_to_data(
+            [self.sagittal_slider.value(), self.coronal_slider.value(), self.axial_slider.value()])
+        return self.oblique_transform.TransformPoint(frame_point)
+
+    def rotate_planes(self, pipeline, angle):
+        """Rotate all slice planes by `angle` degrees around the normal of one view, through the crosshair."""
+        if self.geometry is None:
+            return
+        center = self.crosshair_point()
+        normal = self.oblique_transform.TransformVector(pipeline.normal())
+        step = vtk.vtkTransform()
+        step.Translate(center)
+        step.RotateWXYZ(angle, normal)
+        step.Translate(-center[0], -center[1], -center[2])
+        matrix = vtk.vtkMatrix4x4()
+        vtk.vtkMatrix4x4.Multiply4x4(step.GetMatrix(), self.oblique_transform.GetMatrix(), matrix)
+        self.set_oblique_matrix(matrix)
+
+    def set_oblique_matrix(self, matrix):
+        """Lay the slice planes out in an arbitrary frame.
+
+        `matrix` (a vtkMatrix4x4) maps the frame the axial, coronal and sagittal
+        planes are defined in to the volume's data coordinates; the identity
+        gives the volume's own axes.  Only the shared transform changes, so
+        each view re-executes its reslice once on the next render.
+        """
+        self.oblique_transform.SetMatrix(matrix)
+        identity = vtk.vtkMatrix4x4()
+        oblique = any(matrix.GetElement(row, col) != identity.GetElement(row, col)
+                      for row in range(4) for col in range(4))
+        for pipeline in self.slice_pipelines:
+            pipeline.set_oblique(oblique)
+            self.render_scheduler.request(pipeline.widget)
+
+    def reset_planes(self):
+        self.set_oblique_matrix(vtk.vtkMatrix4x4())
+
+    def show_transfer_function_editor(self):
+        if self.transfer_function_editor is None:
+            self.transfer_function_editor = TransferFunctionEditor(self.volume_pipeline.transfer_function, self)
+            self.transfer_function_editor.changed.connect(self.on_transfer_function_changed)
+        self.transfer_function_editor.show()
+        self.transfer_function_editor.raise_()
+
+    def on_transfer_function_changed(self):
+        # Only the transfer functions change: the 3D view re-renders, nothing is reloaded
+        self.volume_pipeline.update_transfer_function()
+        self.render_scheduler.request(self.three_d_view)
+
+    def set_slab(self, mode, thickness):
+        """Show thick slabs in the slice views: mode is "Max", "Min", "Mean" or None, thickness in mm."""
+        self.slab_mode = mode
+        self.slab_thickness = thickness
+        if self.geometry is None:
+            return
+        for pipeline in self.slice_pipelines:
+            pipeline.set_slab(mode, thickness, self.geometry)
+            self.render_scheduler.request(pipeline.widget)
+
     def on_click_axial(self, obj, event):
+        if self.rotate_action.isChecked():
+            return  # The click starts a plane rotation
         # Capture the point clicked in the axial view
         click_pos = obj.GetEventPosition()
         self.update_views_based_on_click(self.axial_view, click_pos, "axial")
 
     def on_click_coronal(self, obj, event):
+        if self.rotate_action.isChecked():
+            return
         # Capture the point clicked in the coronal view
         click_pos = obj.GetEventPosition()
         self.update_views_based_on_click(self.coronal_view, click_pos, "coronal")
 
     def on_click_sagittal(self, obj, event):
+        if self.rotate_action.isChecked():
+            return
         # Capture the point clicked in the sagittal view
         click_pos = obj.GetEventPosition()
         self.update_views_based_on_click(self.sagittal_view, click_pos, "sagittal")
@@ -436,48 +916,41 @@ class MPRWindow(QMainWindow):
         picker.Pick(click_pos[0], click_pos[1], 0, vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer())
         picked_position = picker.GetPickPosition()  # Get 3D coordinates
 
-        if picker.GetCellId() != -1:
-            # Successfully picked a 3D point
-            x, y, z = picked_position
-            print(f"Clicked on {view_type} view at 3D position: ({x}, {y}, {z})")
+        if picker.GetCellId() != -1 and self.geometry is not None:
+            # Successfully picked a point: find the plane positions through it
+            pipeline = {"axial": self.axial_pipeline, "coronal": self.coronal_pipeline,
+                        "sagittal": self.sagittal_pipeline}[view_type]
+            frame_point = pipeline.picked_frame_point(picked_position)
+            index = self.geometry.nearest_index(self.geometry.data_to_index(frame_point))
+            data_point = self.oblique_transform.TransformPoint(frame_point)
+            x, y, z = self.geometry.index_to_world(self.geometry.data_to_index(data_point))
+            print(f"Clicked on {view_type} view at plane positions {tuple(index.tolist())}, 3D position: ({x}, {y}, {z})")
 
             # Depending on which view was clicked, update the other views
             if view_type == "axial":
-                self.update_coronal_view(x, y)  # Update coronal view
-                self.update_sagittal_view(y, z)  # Update sagittal view
+                self.update_coronal_view(index[CORONAL])  # Update coronal view
+                self.update_sagittal_view(index[SAGITTAL])  # Update sagittal view
             elif view_type == "coronal":
-                self.update_axial_view(x, y)  # Update axial view
-                self.update_sagittal_view(y, z)
+                self.update_axial_view(index[AXIAL])  # Update axial view
+                self.update_sagittal_view(index[SAGITTAL])
 
             elif view_type == "sagittal":
-                self.update_axial_view(x, y)  # Update axial view
-                self.update_coronal_view(x, y)  # Update coronal view
+                self.update_axial_view(index[AXIAL])  # Update axial view
+                self.update_coronal_view(index[CORONAL])  # Update coronal view
         else:
             print(f"No valid pick on {view_type} view")
 
-    def update_axial_view(self, x, z):
-        # Convert (x, z) to axial slice and update
-        slice_index = int(z)
+    def update_axial_view(self, slice_index):
         if slice_index < self.axial_slices:
-            self.axial_slider.setValue(slice_index)
-            self.axial_reslice.SetResliceAxesOrigin(0, 0, slice_index)
-            self.axial_view.GetRenderWindow().Render()
+            self.axial_slider.setValue(int(slice_index))  # update_slice moves the reslice and schedules the render
 
-    def update_coronal_view(self, x, y):
-        # Convert (x, y) to coronal slice and update
-        slice_index = int(y)
+    def update_coronal_view(self, slice_index):
         if slice_index < self.coronal_slices:
-            self.coronal_slider.setValue(slice_index)
-            self.coronal_reslice.SetResliceAxesOrigin(0, slice_index, 0)
-            self.coronal_view.GetRenderWindow().Render()
+            self.coronal_slider.setValue(int(slice_index))  # update_slice moves the reslice and schedules the render
 
-    def update_sagittal_view(self, x, y):
-        # Convert (x, y) to sagittal slice and update
-        slice_index = int(x)
+    def update_sagittal_view(self, slice_index):
         if slice_index < self.sagittal_slices:
-            self.sagittal_slider.setValue(slice_index)
-            self.sagittal_reslice.SetResliceAxesOrigin(slice_index, 0, 0)
-            self.sagittal_view.GetRenderWindow().Render()
+            self.sagittal_slider.setValue(int(slice_index))  # update_slice moves the reslice and schedules the render
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,69 @@
+"""Measure thick-slab update time of the MPR slice reslice.
+
+Moves an axial slab through the volume, as dragging the slider does, and
+reports the milliseconds per slab update for several thicknesses and blend
+modes, with the reslice configured as in the MPR viewer.
+
+    python bench_slab.py [volume.mha] [--thickness 1 5 10 20 40] [--threads N] [--updates 50]
+"""
+import argparse
+import os
+import time
+
+import vtk
+
+from MPR import SLAB_MODES, set_reslice_slab, slab_slices
+from volume_sources import source_for_path
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_example", "MHA", "BRATS_HG0015_T1.mha")
+
+
+def measure(reslice, volume, updates):
+    # Walk the slab through the slices so every update resamples
+    origin = volume.GetOrigin()
+    spacing = volume.GetSpacing()
+    depth = volume.GetDimensions()[2]
+    reslice.SetResliceAxesOrigin(origin[0], origin[1], origin[2] + spacing[2] * (depth // 2))
+    reslice.Update()  # Warm up
+    start = time.perf_counter()
+    for i in range(updates):
+        reslice.SetResliceAxesOrigin(origin[0], origin[1], origin[2] + spacing[2] * (i % depth))
+        reslice.Update()
+    return (time.perf_counter() - start) * 1000 / updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", default=DEFAULT_FILE, help="volume file (any format the viewer opens)")
+    parser.add_argument("--thickness", type=float, nargs="+", default=[1, 5, 10, 20, 40], help="slab thicknesses in mm")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="reslice threads")
+    parser.add_argument("--updates", type=int, default=50, help="slab updates per measurement")
+    args = parser.parse_args()
+
+    reader = source_for_path(args.file).create_reader()
+    reader.Update()
+    volume = reader.GetOutputDataObject(0)
+    print(f"{os.path.basename(args.file)}: {volume.GetDimensions()} voxels, "
+          f"spacing {volume.GetSpacing()}, {args.threads} thread(s)")
+
+    reslice = vtk.vtkImageReslice()
+    reslice.SetInputData(volume)
+    reslice.SetOutputDimensionality(2)
+    reslice.SetInterpolationModeToNearestNeighbor()
+    reslice.AutoCropOutputOn()
+    reslice.SetNumberOfThreads(args.threads)
+
+    print(f"{'thickness':>10} {'slices':>6} " + " ".join(f"{name:>8}" for name, mode in SLAB_MODES.items() if mode))
+    for thickness in args.thickness:
+        slices = slab_slices(thickness, volume.GetSpacing()[2])
+        timings = []
+        for mode in SLAB_MODES.values():
+            if mode is None:
+                continue
+            set_reslice_slab(reslice, mode, slices)
+            timings.append(measure(reslice, volume, args.updates))
+        print(f"{thickness:>8g}mm {slices:>6} " + " ".join(f"{ms:>6.2f}ms" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import vtk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_geometry import AXIAL, SAGITTAL, VolumeGeometry  # noqa: E402
+
+ORIGIN = (-120.0, 35.5, 210.0)
+SPACING = (0.7, 0.9, 3.0)
+DIMENSIONS = (20, 30, 10)
+
+
+def image(direction=None):
+    data = vtk.vtkImageData()
+    data.SetDimensions(DIMENSIONS)
+    data.SetOrigin(ORIGIN)
+    data.SetSpacing(SPACING)
+    if direction is not None:
+        data.SetDirectionMatrix(tuple(np.asarray(direction, dtype=float).ravel()))
+    return data
+
+
+def test_index_world_round_trip_with_origin_and_anisotropic_spacing():
+    geometry = VolumeGeometry(image())
+    np.testing.assert_allclose(geometry.index_to_world((0, 0, 0)), ORIGIN)
+    np.testing.assert_allclose(geometry.index_to_world((2, 3, 4)), (-118.6, 38.2, 222.0))
+    np.testing.assert_allclose(geometry.world_to_index((-118.6, 38.2, 222.0)), (2, 3, 4))
+    np.testing.assert_allclose(geometry.index_to_data((2, 3, 4)), geometry.index_to_world((2, 3, 4)))
+
+
+def test_world_coordinates_follow_the_direction_matrix():
+    # Oblique axial: rows tilted 30 degrees about the x axis
+    angle = np.radians(30)
+    direction = [[1, 0, 0], [0, np.cos(angle), -np.sin(angle)], [0, np.sin(angle), np.cos(angle)]]
+    data = image(direction)
+    geometry = VolumeGeometry(data)
+    index = (5.5, 12.25, 7.0)
+    world = geometry.index_to_world(index)
+
+    # Matches VTK's own index -> physical transform
+    expected = [0.0, 0.0, 0.0]
+    data.TransformContinuousIndexToPhysicalPoint(index, expected)
+    np.testing.assert_allclose(world, expected)
+    np.testing.assert_allclose(geometry.world_to_index(world), index)
+
+    # Data coordinates, used by the reslice, ignore the direction
+    np.testing.assert_allclose(geometry.index_to_data(index), np.add(ORIGIN, np.multiply(SPACING, index)))
+    np.testing.assert_allclose(geometry.data_to_index(geometry.index_to_data(index)), index)
+
+
+def test_nearest_index_and_slice_points():
+    geometry = VolumeGeometry(image())
+    np.testing.assert_array_equal(geometry.nearest_index((-3.2, 14.6, 99.0)), (0, 15, 9))
+    np.testing.assert_allclose(geometry.slice_point(AXIAL, 4), (ORIGIN[0], ORIGIN[1], ORIGIN[2] + 12.0))
+    np.testing.assert_allclose(geometry.slice_point(SAGITTAL, 10), (ORIGIN[0] + 7.0, ORIGIN[1], ORIGIN[2]))
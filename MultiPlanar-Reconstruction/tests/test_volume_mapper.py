@@ -0,0 +1,50 @@
+import os
+import sys
+
+import vtk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MPR  # noqa: E402
+
+
+class FakeRenderWindow:
+    """Stands in for a render window whose OpenGL context reports `renderer`."""
+
+    def __init__(self, renderer, supports_opengl=True):
+        self.renderer = renderer
+        self.supports_opengl = supports_opengl
+
+    def Render(self):
+        pass
+
+    def ReportCapabilities(self):
+        return f"OpenGL vendor string: Test\\nOpenGL renderer string: {self.renderer}\\n" if self.renderer else ""
+
+    def SupportsOpenGL(self):
+        return self.supports_opengl
+
+
+def select(render_window):
+    return MPR.select_volume_mapper(render_window, vtk.vtkVolumeProperty())
+
+
+def test_no_renderer_string_falls_back_to_cpu():
+    mapper, name = select(FakeRenderWindow(""))
+    assert name == "CPU"
+    assert isinstance(mapper, vtk.vtkFixedPointVolumeRayCastMapper)
+
+
+def test_software_renderer_falls_back_to_cpu():
+    assert select(FakeRenderWindow("llvmpipe (LLVM 15.0.6, 256 bits)"))[1] == "CPU"
+
+
+def test_context_without_opengl_falls_back_to_cpu():
+    assert select(FakeRenderWindow("NVIDIA GeForce RTX 3080", supports_opengl=False))[1] == "CPU"
+
+
+def test_gpu_override_skips_the_checks(monkeypatch):
+    monkeypatch.setattr(MPR, "VOLUME_MAPPER", "gpu")
+    mapper, name = select(FakeRenderWindow(""))
+    assert name == "GPU"
+    assert isinstance(mapper, vtk.vtkGPUVolumeRayCastMapper)
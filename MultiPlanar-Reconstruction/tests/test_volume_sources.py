@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+MPR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIEWER_DIR = os.path.join(os.path.dirname(MPR_DIR), "DICOM_Viewer")
+sys.path.insert(0, MPR_DIR)
+
+from volume_sources import NumpyVolumeSource  # noqa: E402
+
+SERIES_DIR = os.path.join(VIEWER_DIR, "data_example", "3D")
+
+
+def test_cli_volume_round_trip(tmp_path):
+    """A volume written by `dicom_cli.py volume` opens in the MPR viewer with its geometry."""
+    subprocess.run([sys.executable, os.path.join(VIEWER_DIR, "dicom_cli.py"), "volume", SERIES_DIR,
+                    "--output", str(tmp_path)], check=True, capture_output=True)
+    source = NumpyVolumeSource.from_file(str(tmp_path / "3D.npy"))
+    image = source.create_image()
+
+    assert image.GetDimensions() == (512, 512, 31)
+    assert image.GetSpacing() == pytest.approx((0.732421875, 0.732421875, 2.0), abs=1e-5)
+    assert image.GetOrigin() == pytest.approx((-177.71115303039, -100.01669364424, 143.324983706748))
+    matrix = image.GetDirectionMatrix()
+    direction = np.array([[matrix.GetElement(row, col) for col in range(3)] for row in range(3)])
+    assert direction[:, 0] == pytest.approx([1.0, 0.0, 0.0])  # Rows run along the patient's x axis
+    assert np.linalg.det(direction) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_sidecar_without_origin_is_rejected(tmp_path):
+    np.save(tmp_path / "volume.npy", np.zeros((2, 3, 4), dtype=np.int16))
+    (tmp_path / "volume.json").write_text('{"spacing": [2.0, 1.0, 1.0]}')
+    with pytest.raises(ValueError, match="origin"):
+        NumpyVolumeSource.from_file(str(tmp_path / "volume.npy"))
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import vtk
+from vtk.util import numpy_support
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_statistics import DISPLAY_PERCENTILES, VOLUME_PERCENTILES, VolumeStatistics, statistics_for  # noqa: E402
+
+
+def image(values):
+    data = vtk.vtkImageData()
+    data.SetDimensions(len(values), 1, 1)
+    data.GetPointData().SetScalars(numpy_support.numpy_to_vtk(np.ascontiguousarray(values), deep=True))
+    return data
+
+
+def test_percentiles_match_numpy():
+    rng = np.random.default_rng(7)
+    values = rng.normal(40.0, 300.0, 200000)
+    values[:50] = 3000.0  # Metal
+    values[50:5000] = -1000.0  # Air
+    statistics = VolumeStatistics(image(values))
+    bin_width = statistics.edges[1] - statistics.edges[0]
+    for percent in (1.0, 5.0, 50.0, 99.0, 99.5):
+        assert statistics.percentile(percent) == pytest.approx(np.percentile(values, percent), abs=bin_width)
+
+
+@pytest.mark.parametrize("percentiles", [DISPLAY_PERCENTILES, VOLUME_PERCENTILES])
+def test_window_level_spans_the_percentiles(percentiles):
+    values = np.arange(10001, dtype=np.float64)
+    statistics = VolumeStatistics(image(values))
+    low, high = np.percentile(values, percentiles)
+    window, level = statistics.window_level(percentiles)
+    bin_width = statistics.edges[1] - statistics.edges[0]
+    assert window == pytest.approx(high - low, abs=2 * bin_width)
+    assert level == pytest.approx((high + low) / 2, abs=bin_width)
+
+
+def test_constant_volume_gets_a_non_zero_window():
+    statistics = VolumeStatistics(image(np.full(1000, 42, dtype=np.int16)))
+    window, level = statistics.window_level()
+    assert window == 1.0
+    assert level == 42.5
+
+
+def test_statistics_are_cached_until_the_scalars_change():
+    data = image(np.arange(100, dtype=np.float32))
+    first = statistics_for(data)
+    assert statistics_for(data) is first
+    data.GetPointData().GetScalars().Modified()
+    assert statistics_for(data) is not first
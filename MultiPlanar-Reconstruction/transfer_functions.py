@@ -0,0 +1,79 @@
+"""Transfer-function presets of the 3D view and their mapping onto VTK's functions.
+
+Opacity points are (scalar, opacity) and color points (scalar, r, g, b).
+CT presets are in Hounsfield units; "relative" presets (MR, whose
+intensities have no fixed scale) are in fractions of the volume's default
+window, 0 at its low end and 1 at its high end.  `center` is the scalar the
+width edit scales around.
+"""
+
+PRESETS = {
+    "Default": {
+        "relative": True, "center": 0.5,
+        "opacity": [(0.0, 0.0), (1.0, 1.0)],
+        "color": [(0.0, 0.0, 0.0, 0.0), (1.0, 1.0, 1.0, 1.0)],
+    },
+    "CT Bone": {
+        "relative": False, "center": 700.0,
+        "opacity": [(-1000.0, 0.0), (150.0, 0.0), (300.0, 0.15), (1200.0, 0.9), (3000.0, 1.0)],
+        "color": [(-1000.0, 0.0, 0.0, 0.0), (150.0, 0.55, 0.25, 0.15), (300.0, 0.9, 0.8, 0.6),
+                  (1200.0, 1.0, 1.0, 0.95), (3000.0, 1.0, 1.0, 1.0)],
+    },
+    "CT Soft Tissue": {
+        "relative": False, "center": 40.0,
+        "opacity": [(-1000.0, 0.0), (-160.0, 0.0), (40.0, 0.4), (240.0, 0.6), (3000.0, 0.6)],
+        "color": [(-1000.0, 0.0, 0.0, 0.0), (-160.0, 0.55, 0.25, 0.15), (40.0, 0.88, 0.6, 0.5),
+                  (240.0, 1.0, 0.94, 0.85), (3000.0, 1.0, 1.0, 1.0)],
+    },
+    "CT Lung": {
+        "relative": False, "center": -650.0,
+        "opacity": [(-1000.0, 0.0), (-900.0, 0.0), (-750.0, 0.15), (-500.0, 0.3), (-300.0, 0.0), (3000.0, 0.0)],
+        "color": [(-1000.0, 0.3, 0.3, 1.0), (-750.0, 0.6, 0.7, 1.0), (-500.0, 0.9, 0.8, 0.8),
+                  (-300.0, 1.0, 0.9, 0.8), (3000.0, 1.0, 1.0, 1.0)],
+    },
+    "MR": {
+        "relative": True, "center": 0.5,
+        "opacity": [(0.0, 0.0), (0.2, 0.0), (0.5, 0.3), (1.0, 0.8)],
+        "color": [(0.0, 0.0, 0.0, 0.0), (0.2, 0.45, 0.3, 0.25), (0.5, 0.85, 0.7, 0.6), (1.0, 1.0, 1.0, 1.0)],
+    },
+}
+
+
+class TransferFunction:
+    """A preset plus the user's edits: a shift, a width scale and an opacity scale.
+
+    `shift` is a fraction of the volume's default window, `width` scales the
+    preset's points around its center and `opacity` scales every opacity.
+    """
+
+    def __init__(self, preset="Default"):
+        self.preset = preset
+        self.reset()
+
+    def reset(self):
+        self.shift = 0.0
+        self.width = 1.0
+        self.opacity = 1.0
+
+    def scalar(self, value, low, high):
+        preset = PRESETS[self.preset]
+        if preset["relative"]:
+            value = low + value * (high - low)
+            center = low + preset["center"] * (high - low)
+        else:
+            center = preset["center"]
+        return center + (value - center) * self.width + self.shift * (high - low)
+
+    def apply(self, opacity_function, color_function, low, high):
+        """Rewrite the points of existing VTK functions for a volume whose default window is low..high.
+
+        The functions are edited in place, so the mapper keeps its volume and
+        only rebuilds its lookup tables on the next render.
+        """
+        preset = PRESETS[self.preset]
+        opacity_function.RemoveAllPoints()
+        for value, opacity in preset["opacity"]:
+            opacity_function.AddPoint(self.scalar(value, low, high), min(1.0, opacity * self.opacity))
+        color_function.RemoveAllPoints()
+        for value, red, green, blue in preset["color"]:
+            color_function.AddRGBPoint(self.scalar(value, low, high), red, green, blue)
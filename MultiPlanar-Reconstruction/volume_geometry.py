@@ -0,0 +1,44 @@
+import numpy as np
+
+AXIAL, CORONAL, SAGITTAL = 2, 1, 0  # Index axis each view slices along
+
+
+class VolumeGeometry:
+    """Index <-> physical coordinates of a loaded volume.
+
+    Indices are (x, y, z) = (column, row, slice).  World coordinates follow
+    the image's origin, spacing and direction matrix.  vtkImageReslice works
+    in data coordinates instead (origin + index * spacing, without the
+    direction), so positions handed to a reslice use the `data` methods.
+    """
+
+    def __init__(self, image_data):
+        self.dimensions = np.array(image_data.GetDimensions())
+        self.origin = np.array(image_data.GetOrigin(), dtype=float)
+        self.spacing = np.array(image_data.GetSpacing(), dtype=float)
+        matrix = image_data.GetDirectionMatrix()
+        self.direction = np.array([[matrix.GetElement(row, col) for col in range(3)] for row in range(3)])
+
+    def index_to_world(self, index):
+        return self.origin + self.direction @ (self.spacing * np.asarray(index, dtype=float))
+
+    def world_to_index(self, point):
+        """Continuous index of a world point."""
+        return self.direction.T @ (np.asarray(point, dtype=float) - self.origin) / self.spacing
+
+    def index_to_data(self, index):
+        return self.origin + self.spacing * np.asarray(index, dtype=float)
+
+    def data_to_index(self, point):
+        """Continuous index of a point in data coordinates."""
+        return (np.asarray(point, dtype=float) - self.origin) / self.spacing
+
+    def nearest_index(self, index):
+        """The voxel closest to a continuous index, clamped to the volume."""
+        return np.clip(np.rint(index), 0, self.dimensions - 1).astype(int)
+
+    def slice_point(self, axis, slice_index):
+        """Data coordinates of the voxel plane `slice_index` along an index axis."""
+        index = np.zeros(3)
+        index[axis] = slice_index
+        return self.index_to_data(index)
@@ -0,0 +1,144 @@
+import json
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+class VolumeSource:
+    """Where an MPR volume comes from.
+
+    `create_reader` returns a VTK algorithm that has not run yet; running it
+    (on the loader thread) produces the volume as vtkImageData.  The viewer
+    keeps the source for as long as the volume is shown, so a source can
+    hold on to memory the volume points into.
+    """
+    kind = "volume"
+
+    def create_reader(self):
+        raise NotImplementedError
+
+
+class DicomDirectorySource(VolumeSource):
+    kind = "DICOM"
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def create_reader(self):
+        reader = vtk.vtkDICOMImageReader()
+        reader.SetDirectoryName(self.directory)
+        return reader
+
+
+class FileSource(VolumeSource):
+    """A single-file format read by one VTK reader class."""
+    reader_class = None
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def create_reader(self):
+        reader = self.reader_class()
+        reader.SetFileName(self.file_path)
+        return reader
+
+
+class MetaImageSource(FileSource):
+    kind = "MHA"
+    reader_class = vtk.vtkMetaImageReader
+
+
+class NrrdSource(FileSource):
+    kind = "NRRD"
+    reader_class = vtk.vtkNrrdReader
+
+
+class NiftiSource(FileSource):
+    kind = "NIfTI"
+    reader_class = vtk.vtkNIFTIImageReader
+
+
+class NumpyVolumeSource(VolumeSource):
+    """An in-memory (slices, rows, columns) array, shown without copying.
+
+    The volume's scalars point straight into the array's buffer, so writing
+    into `array` changes the volume (call `Modified()` on the image to show
+    it).  The array must stay alive, which this source takes care of, and
+    must not be resized while it is shown.
+    """
+    kind = "NumPy"
+
+    def __init__(self, array, spacing=(1.0, 1.0, 1.0), origin=(0.0, 0.0, 0.0), direction=None):
+        if array.ndim != 3:
+            raise ValueError(f"expected a (slices, rows, columns) volume, got shape {array.shape}")
+        # Only copies when the array is not already C-contiguous (e.g. a transposed view)
+        self.array = np.ascontiguousarray(array)
+        self.spacing = tuple(float(value) for value in spacing)  # x (column), y (row), z (slice)
+        self.origin = tuple(float(value) for value in origin)
+        # Columns are the directions of the x, y and z index axes
+        self.direction = np.eye(3) if direction is None else np.asarray(direction, dtype=float).reshape(3, 3)
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Memory-map a .npy volume, with its geometry from a JSON sidecar when there is one."""
+        # Copy-on-write keeps the mapping zero-copy while giving VTK a writable buffer
+        array = np.load(file_path, mmap_mode="c")
+        sidecar_path = os.path.splitext(file_path)[0] + ".json"
+        geometry = {}
+        if os.path.exists(sidecar_path):
+            with open(sidecar_path) as f:
+                geometry = json.load(f)
+            missing = [key for key in ("origin", "spacing", "directions") if key not in geometry]
+            if missing:
+                raise ValueError(f"{os.path.basename(sidecar_path)} has no {', '.join(missing)}; "
+                                 "re-export the volume with the DICOM Viewer")
+        directions = geometry.get("directions")  # One row per axis direction
+        return cls(array, geometry.get("spacing", (1.0, 1.0, 1.0)), geometry.get("origin", (0.0, 0.0, 0.0)),
+                   None if directions is None else np.transpose(directions))
+
+    def create_image(self):
+        """A vtkImageData whose scalars share the array's memory."""
+        slices, rows, cols = self.array.shape
+        image = vtk.vtkImageData()
+        image.SetDimensions(cols, rows, slices)
+        image.SetSpacing(self.spacing)
+        image.SetOrigin(self.origin)
+        image.SetDirectionMatrix(self.direction.ravel())
+
+        # deep=False wraps the buffer and keeps a reference to the array on the VTK array
+        scalars = numpy_support.numpy_to_vtk(self.array.reshape(-1), deep=False)
+        scalars.SetName("scalars")
+        image.GetPointData().SetScalars(scalars)
+        return image
+
+    def create_reader(self):
+        producer = vtk.vtkTrivialProducer()
+        producer.SetOutput(self.create_image())
+        return producer
+
+
+FILE_SOURCES = {
+    ".mha": MetaImageSource,
+    ".mhd": MetaImageSource,
+    ".nrrd": NrrdSource,
+    ".nhdr": NrrdSource,
+    ".nii": NiftiSource,
+    ".nii.gz": NiftiSource,
+}
+
+
+def source_for_path(path):
+    """The volume source for a file or DICOM directory, from its extension."""
+    if os.path.isdir(path):
+        return DicomDirectorySource(path)
+    lower = path.lower()
+    if lower.endswith(".dcm"):
+        return DicomDirectorySource(os.path.dirname(path))
+    if lower.endswith(".npy"):
+        return NumpyVolumeSource.from_file(path)
+    for extension, source_class in FILE_SOURCES.items():
+        if lower.endswith(extension):
+            return source_class(path)
+    raise ValueError(f"unsupported volume file: {path}")
@@ -0,0 +1,56 @@
+import numpy as np
+from vtk.util import numpy_support
+
+HISTOGRAM_BINS = 4096
+MAX_SAMPLES = 1 << 20  # Voxels the histogram is built from, spread evenly over the volume
+DISPLAY_PERCENTILES = (1.0, 99.0)  # Default window of the slice views
+VOLUME_PERCENTILES = (5.0, 99.5)  # Default transfer-function range of the 3D view
+
+
+class VolumeStatistics:
+    """Intensity histogram of a volume, from a regular subsample of its voxels.
+
+    Percentiles read from it ignore the few extreme voxels (air, metal,
+    padding) that make the full scalar range a washed-out window.
+    """
+
+    def __init__(self, image_data):
+        values = numpy_support.vtk_to_numpy(image_data.GetPointData().GetScalars())
+        if values.ndim > 1:
+            values = values[:, 0]  # First component
+        sample = values[::max(1, values.size // MAX_SAMPLES)]
+        self.minimum = float(sample.min())
+        self.maximum = float(sample.max())
+        if self.maximum == self.minimum:
+            self.maximum = self.minimum + 1.0  # Constant volume: any window will do
+        self.counts, self.edges = np.histogram(sample, bins=HISTOGRAM_BINS, range=(self.minimum, self.maximum))
+        self.cumulative = np.cumsum(self.counts)
+
+    def percentile(self, percent):
+        """Intensity below which `percent` % of the sampled voxels fall, interpolated within its bin."""
+        target = percent / 100 * self.cumulative[-1]
+        bin_index = min(int(np.searchsorted(self.cumulative, target)), len(self.counts) - 1)
+        below = self.cumulative[bin_index - 1] if bin_index > 0 else 0
+        fraction = (target - below) / self.counts[bin_index] if self.counts[bin_index] else 0.0
+        return float(self.edges[bin_index] + fraction * (self.edges[bin_index + 1] - self.edges[bin_index]))
+
+    def window_level(self, percentiles=DISPLAY_PERCENTILES):
+        """Window (contrast) and level (brightness) spanning two percentiles."""
+        low, high = self.percentile(percentiles[0]), self.percentile(percentiles[1])
+        if high - low < self.edges[1] - self.edges[0]:
+            low, high = self.minimum, self.maximum  # Nearly constant volume: narrower than one bin
+        return high - low, (high + low) / 2
+
+
+def statistics_for(image_data):
+    """The statistics of a volume, computed once and cached on its scalars.
+
+    Volumes that share their scalars (shallow copies, the views' inputs) share
+    the cache; it is recomputed only after the scalars are modified.
+    """
+    scalars = image_data.GetPointData().GetScalars()
+    cached = getattr(scalars, "statistics", None)
+    if cached is None or cached[0] != scalars.GetMTime():
+        cached = (scalars.GetMTime(), VolumeStatistics(image_data))
+        scalars.statistics = cached
+    return cached[1]